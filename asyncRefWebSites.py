@@ -0,0 +1,326 @@
+import asyncio
+import datetime
+import os
+import threading
+from typing import List, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+from bs4 import BeautifulSoup
+from yarl import URL
+
+from mslSession import MslSession, mslSession
+from pageCache import PageCache
+from refWebSites import (MySoccerLeague, REFEREES_URL, REPORT_CHOICE_URL, SEASON_DATES_URL,
+                         onSite, reportWindow, requestTimeout, scrapeWorkers)
+from retryPolicy import RetryPolicy, mslRetry
+
+"""
+An asyncio version of MySoccerLeague.  It has the same methods, but all the
+requests go through one aiohttp session (so connections to MSL are reused)
+and a semaphore limits how many are in flight.  The page cache, the page
+parsing and the circuit breaker are shared with the mechanicalsoup version.
+
+Code that isn't async (Streamlit, main.py) uses BlockingMySoccerLeague.
+"""
+
+# same policy (and circuit breaker) as the blocking scraper, for aiohttp's errors
+asyncMslRetry = mslRetry.withRetryOn((aiohttp.ClientConnectionError,
+                                      aiohttp.ClientResponseError,
+                                      asyncio.TimeoutError))
+
+
+def _formFields(page: str, overrides: dict) -> Tuple[str, str, list]:
+    """
+    The action, method and fields of the first form on page, the way a
+    browser would submit it, with the values in overrides filled in.
+    """
+    form = BeautifulSoup(page, 'lxml').find('form')
+    fields = []
+    submitted = False
+    for tag in form.select('input[name], select[name], textarea[name]'):
+        name = tag.get('name')
+        kind = tag.get('type', '').lower()
+        if tag.has_attr('disabled'):
+            continue
+        if tag.name == 'input' and kind in ('radio', 'checkbox'):
+            if name in overrides:
+                if tag.get('value', 'on') != overrides[name]:
+                    continue
+            elif 'checked' not in tag.attrs:
+                continue
+            fields.append((name, tag.get('value', 'on')))
+            continue
+        if tag.name == 'input' and kind in ('submit', 'image'):
+            # only the first submit button goes with the form
+            if not submitted:
+                fields.append((name, tag.get('value', '')))
+                submitted = True
+            continue
+        if name in overrides:
+            fields.append((name, overrides[name]))
+        elif tag.name == 'select':
+            options = tag.select('option')
+            selected = [o for o in options if 'selected' in o.attrs] or options[:1]
+            fields.extend((name, o.get('value', o.text)) for o in selected)
+        elif tag.name == 'textarea':
+            fields.append((name, tag.text))
+        else:
+            fields.append((name, tag.get('value', '')))
+    return form.get('action', ''), form.get('method', 'get').lower(), fields
+
+
+class AsyncMySoccerLeague(object):
+
+    def __init__(self,
+                 concurrency: int = None,
+                 cache: PageCache = None,
+                 retry: RetryPolicy = None,
+                 session: MslSession = None):
+        self._loginPage = "https://mysoccerleague.com/YSLmobile.jsp"
+        self._loginFormInput = { 'userName': os.environ['mslUsername'],
+                                 'password': os.environ['mslPassword'] }
+        self._siteBase = os.environ.get('MSL_BASE_URL')
+        self._cache = cache if cache is not None else PageCache()
+        self._retry = retry if retry is not None else asyncMslRetry
+        self._semaphore = asyncio.Semaphore(concurrency if concurrency is not None else scrapeWorkers)
+        self._http = None
+        # the login is shared with every other scraper in the process, sync
+        # or async.  _loginKey is the one whose cookies our http session has
+        self._session = session if session is not None else mslSession
+        self._loginKey = None
+        self._loginLock = asyncio.Lock()
+        self._getFutureDates(datetime.date.today())
+        self.emails = []
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+    def _httpSession(self) -> aiohttp.ClientSession:
+        # created on first use so it belongs to the loop we run on
+        if self._http is None:
+            self._http = aiohttp.ClientSession(headers={ 'User-Agent': 'Chrome' },
+                                               timeout=aiohttp.ClientTimeout(total=requestTimeout),
+                                               connector=aiohttp.TCPConnector(limit_per_host=0))
+        return self._http
+
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+
+    def _getFutureDates(self, d: datetime.date):
+        # main.py hands us a datetime, the page cache compares dates
+        if isinstance(d, datetime.datetime):
+            d = d.date()
+        while d.weekday() != 4:  # Friday
+            d += datetime.timedelta(1)
+        self._weekend = [d, d + datetime.timedelta(1), d + datetime.timedelta(2)]
+
+
+    def setSpecificDate(self, d: datetime.date) -> None:
+        self._getFutureDates(d)
+
+
+    async def _request(self, method: str, url: str, data: list = None) -> str:
+        # a GET form sends its fields in the query string, like a browser
+        if method.lower() == 'get':
+            params, data = data, None
+        else:
+            params = None
+        async with self._semaphore:
+            async with self._httpSession().request(method, url, params=params, data=data) as response:
+                # like the blocking scraper, only server errors and throttling
+                # are worth another try
+                if response.status >= 500 or response.status == 429:
+                    response.raise_for_status()
+                return await response.text()
+
+
+    def _useLogin(self, key: str, cookies: dict) -> str:
+        # somebody else logged in, send their cookies along with their key
+        if key != self._loginKey:
+            self._httpSession().cookie_jar.update_cookies(cookies, URL(onSite(self._loginPage, self._siteBase)))
+            self._loginKey = key
+        return key
+
+
+    async def _key(self) -> str:
+        key, cookies = self._session.current()
+        if key is None:
+            return await self._login()
+        return self._useLogin(key, cookies)
+
+
+    async def _login(self, staleKey: str = None) -> str:
+        async with self._loginLock:
+            if staleKey is not None:
+                self._session.invalidate(staleKey)
+            # somebody else may have logged in while we waited
+            key, cookies = self._session.current()
+            if key is not None:
+                return self._useLogin(key, cookies)
+
+            loginUrl = onSite(self._loginPage, self._siteBase)
+            page = await self._request('get', loginUrl)
+            action, method, fields = _formFields(page, self._loginFormInput)
+            page = await self._request(method, urljoin(loginUrl, action), fields)
+            self._loginKey = MySoccerLeague._loginKeyFromPage(BeautifulSoup(page, 'lxml'))
+            self._session.store(self._loginKey, { cookie.key: cookie.value for cookie in self._httpSession().cookie_jar })
+            return self._loginKey
+
+
+    async def _download(self, url: str) -> str:
+        key = await self._key()
+        page = await self._request('get', url.replace('?', f'?YSLkey={key}&', 1))
+        if MslSession.isExpired(page):
+            # MSL sent us back to the login form, log in again and retry once
+            key = await self._login(key)
+            page = await self._request('get', url.replace('?', f'?YSLkey={key}&', 1))
+        return page
+
+
+    async def _fetch(self,
+                     url: str,
+                     date: datetime.date = None,
+                     refresh: bool = False,
+                     download = None) -> str:
+        url = onSite(url, self._siteBase)
+        # the cache reads and writes files, keep that off the event loop
+        if not refresh:
+            page = await asyncio.to_thread(self._cache.get, url, date)
+            if page is not None:
+                return page
+
+        page = await self._retry.callAsync(download or self._download, url)
+        if not MslSession.isExpired(page):
+            await asyncio.to_thread(self._cache.put, url, date, page)
+        return page
+
+
+    async def getAllDatesForSeason(self, refresh: bool = False) -> list:
+        return MySoccerLeague._datesFromPage(await self._fetch(SEASON_DATES_URL, refresh=refresh))
+
+
+    async def getMatches(self, dateInfo: str, refresh: bool = False) -> dict:
+        url, date = MySoccerLeague._matchesUrl(dateInfo)
+        return MySoccerLeague._matchesFromPage(await self._fetch(url, date, refresh))
+
+
+    async def getSeasonMatches(self, dates: List[str], refresh: bool = False) -> dict:
+        """ getMatches for every date, all at once, keyed (in order) by date """
+        matches = await asyncio.gather(*[self.getMatches(d, refresh) for d in dates])
+        return dict(zip(dates, matches))
+
+
+    async def getAssignments(self,
+                             dates: list = None,
+                             startDate: datetime.date = None,
+                             endDate: datetime.date = None) -> dict:
+        dates = MySoccerLeague._assignmentDates(dates, startDate, endDate, self._weekend)
+
+        pages = await asyncio.gather(*[self._fetch(MySoccerLeague._assignmentsUrl(d), d) for d in dates])
+        return MySoccerLeague._mergeAssignments(dates, pages)
+
+
+    async def getAllReferees(self) -> list:
+        retVal, self.emails = MySoccerLeague._refereesFromPage(await self._fetch(REFEREES_URL))
+        return retVal
+
+
+    async def getReportData(self, startDate: str, endDate: str, refresh: bool = False) -> str:
+        async def submitReportForm(_):
+            choiceUrl = onSite(REPORT_CHOICE_URL, self._siteBase)
+            page = await self._download(choiceUrl)
+            action, method, fields = _formFields(page, { 'YSLkey': self._loginKey,
+                                                         'returnJsp': 'ShowGameReports.jsp',
+                                                         'dateMode': 'selectDates',
+                                                         'startDate': startDate,
+                                                         'endDate': endDate })
+            return await self._request(method, urljoin(choiceUrl, action), fields)
+
+        cacheUrl, cacheDate = MySoccerLeague._reportCacheKey(startDate, endDate)
+        return await self._fetch(cacheUrl, cacheDate, refresh, submitReportForm)
+
+
+    async def getReportForSeason(self, startDate: str, endDate: str, window: str = None) -> dict:
+        async def windowMetrics(w):
+            return MySoccerLeague._metricsFromPage(await self.getReportData(*w))
+
+        windows = MySoccerLeague._reportWindows(startDate, endDate, window or reportWindow)
+        return MySoccerLeague._mergeMetrics(await asyncio.gather(*[windowMetrics(w) for w in windows]))
+
+
+class BlockingMySoccerLeague(object):
+    """
+    AsyncMySoccerLeague for callers that aren't async.  It runs its own event
+    loop on a background thread so the aiohttp session (and its connections)
+    live as long as this object does.
+    """
+
+    def __init__(self, concurrency: int = None, cache: PageCache = None, session: MslSession = None):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._site = self._run(self._create(concurrency, cache, session))
+
+
+    @staticmethod
+    async def _create(concurrency: int, cache: PageCache, session: MslSession) -> AsyncMySoccerLeague:
+        # made on our loop, where its semaphore, lock and session are used
+        return AsyncMySoccerLeague(concurrency, cache, session=session)
+
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+
+    @property
+    def emails(self) -> list:
+        return self._site.emails
+
+
+    def close(self) -> None:
+        self._run(self._site.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+    def setSpecificDate(self, d: datetime.date) -> None:
+        self._site.setSpecificDate(d)
+
+
+    def getAllDatesForSeason(self, refresh: bool = False) -> list:
+        return self._run(self._site.getAllDatesForSeason(refresh))
+
+
+    def getMatches(self, dateInfo: str, refresh: bool = False) -> dict:
+        return self._run(self._site.getMatches(dateInfo, refresh))
+
+
+    def getSeasonMatches(self, dates: List[str], refresh: bool = False) -> dict:
+        return self._run(self._site.getSeasonMatches(dates, refresh))
+
+
+    def getAssignments(self,
+                       dates: list = None,
+                       startDate: datetime.date = None,
+                       endDate: datetime.date = None) -> dict:
+        return self._run(self._site.getAssignments(dates, startDate, endDate))
+
+
+    def getAllReferees(self) -> list:
+        return self._run(self._site.getAllReferees())
+
+
+    def getReportForSeason(self, startDate: str, endDate: str, window: str = None) -> dict:
+        return self._run(self._site.getReportForSeason(startDate, endDate, window))
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Mapping
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from mslRecords import SeasonMatches
+
+"""
+The latest snapshot of what the app shows from MSL (season dates and
+matches, the referee roster and this weekend's assignments), shared by
+every process on the host through one SQLite file.
+
+The prefetch worker writes a whole new version of the snapshot and then
+points currentVersion at it in the same transaction, so readers see the old
+version or the new one and never a mix.  A reader only pulls in the
+dates it is asked for, so more app processes don't mean more copies of
+the season in memory.  Finished dates don't change, so each date's
+matches are stored once by content and shared between versions.
+"""
+
+# how many versions to keep, so a reader part way through an older one
+# can still finish
+keepVersions = int(os.environ.get('MSL_SNAPSHOT_KEEP', '3'))
+
+_schema = [
+    '''CREATE TABLE IF NOT EXISTS snapshots (version INTEGER PRIMARY KEY AUTOINCREMENT,
+                                             published REAL,
+                                             dates BLOB,
+                                             referees BLOB,
+                                             emails BLOB,
+                                             assignments BLOB)''',
+    '''CREATE TABLE IF NOT EXISTS snapshotDates (version INTEGER,
+                                                 date TEXT,
+                                                 digest TEXT,
+                                                 PRIMARY KEY (version, date))''',
+    '''CREATE TABLE IF NOT EXISTS matchPages (digest TEXT PRIMARY KEY, matches BLOB)''',
+    '''CREATE TABLE IF NOT EXISTS currentVersion (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER)''',
+    '''CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL)''',
+]
+
+
+class StoredSeason(Mapping):
+    """
+    The season matches of one snapshot version, read from the store a date
+    at a time.  It reads like the dict (or SeasonMatches) it stands for.
+    """
+
+    def __init__(self, store: 'DataStore', version: int, dates: list):
+        self._store = store
+        self._version = version
+        self._dates = dates
+        self._read = lru_cache(maxsize=8)(self._readDate)
+
+
+    def _readDate(self, date: str) -> dict:
+        row = self._store._connection().execute(
+            '''SELECT m.matches FROM snapshotDates d JOIN matchPages m ON m.digest = d.digest
+               WHERE d.version = ? AND d.date = ?''', (self._version, date)).fetchone()
+        if row is None:
+            raise KeyError(date)
+        return pickle.loads(row[0])[date]
+
+
+    def __getitem__(self, date: str) -> dict:
+        return self._read(date)
+
+
+    def __contains__(self, date) -> bool:
+        return date in self._dates
+
+
+    def __iter__(self):
+        return iter(self._dates)
+
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+
+class DataStore(object):
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.environ.get('MSL_SNAPSHOT_PATH',
+                                  os.path.join(os.environ.get('MSL_CACHE_DIR', '.mslcache'), 'snapshot.sqlite'))
+        self._path = path
+        self._local = threading.local()
+        self._loaded = None
+        self._loadedVersion = None
+        self.owner = uuid.uuid4().hex
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        db = self._connection()
+        # readers keep reading while the worker writes a new version
+        db.execute('PRAGMA journal_mode=WAL')
+        for sql in _schema:
+            db.execute(sql)
+
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections belong to the thread that made them
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        return db
+
+
+    def publish(self, snapshot: dict) -> int:
+        """ Write snapshot as a new version and make it the current one """
+        matches = snapshot['matches']
+        pages = {}
+        for date in snapshot['dates']:
+            page = pickle.dumps(SeasonMatches({ date: matches[date] }), protocol=pickle.HIGHEST_PROTOCOL)
+            pages[date] = (hashlib.sha1(page).hexdigest(), page)
+
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            version = db.execute('INSERT INTO snapshots (published, dates, referees, emails, assignments) VALUES (?, ?, ?, ?, ?)',
+                                 (snapshot['published'].timestamp(),
+                                  pickle.dumps(snapshot['dates']),
+                                  pickle.dumps(snapshot['referees']),
+                                  pickle.dumps(snapshot['emails']),
+                                  pickle.dumps(snapshot['assignments']))).lastrowid
+            db.executemany('INSERT OR IGNORE INTO matchPages (digest, matches) VALUES (?, ?)', pages.values())
+            db.executemany('INSERT INTO snapshotDates (version, date, digest) VALUES (?, ?, ?)',
+                           [(version, date, digest) for date, (digest, _) in pages.items()])
+            # the swap, readers pick the new version up on their next load()
+            db.execute('INSERT OR REPLACE INTO currentVersion (id, version) VALUES (0, ?)', (version,))
+
+            oldest = version - keepVersions + 1
+            db.execute('DELETE FROM snapshotDates WHERE version < ?', (oldest,))
+            db.execute('DELETE FROM snapshots WHERE version < ?', (oldest,))
+            db.execute('DELETE FROM matchPages WHERE digest NOT IN (SELECT digest FROM snapshotDates)')
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return version
+
+
+    def load(self) -> Optional[dict]:
+        """ The latest snapshot, or None if nothing has been published yet """
+        db = self._connection()
+        row = db.execute('SELECT version FROM currentVersion WHERE id = 0').fetchone()
+        if row is None:
+            return None
+
+        version = row[0]
+        if version != self._loadedVersion:
+            published, dates, referees, emails, assignments = db.execute(
+                'SELECT published, dates, referees, emails, assignments FROM snapshots WHERE version = ?',
+                (version,)).fetchone()
+            dates = pickle.loads(dates)
+            self._loaded = {
+                'version': version,
+                'published': datetime.fromtimestamp(published),
+                'dates': dates,
+                'matches': StoredSeason(self, version, dates),
+                'referees': pickle.loads(referees),
+                'emails': pickle.loads(emails),
+                'assignments': pickle.loads(assignments)
+            }
+            self._loadedVersion = version
+        return self._loaded
+
+
+    def wait(self, timeout: float = None, poll: float = 1.0) -> Optional[dict]:
+        """ load(), waiting up to timeout seconds (forever if None) for a first snapshot """
+        start = time.monotonic()
+        snapshot = self.load()
+        while snapshot is None:
+            if timeout is not None and time.monotonic() - start >= timeout:
+                break
+            time.sleep(poll)
+            snapshot = self.load()
+        return snapshot
+
+
+    def acquireLease(self, name: str, ttl: float) -> bool:
+        """
+        Take (or keep) the lease called name for ttl seconds.  Only one
+        process on the host holds it at a time, so only one of them scrapes.
+        """
+        db = self._connection()
+        now = time.time()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT owner, expires FROM leases WHERE name = ?', (name,)).fetchone()
+            acquired = row is None or row[0] == self.owner or row[1] < now
+            if acquired:
+                db.execute('INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)',
+                           (name, self.owner, now + ttl))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return acquired
@@ -1,134 +1,165 @@
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from io import StringIO
 import os
 import psycopg
-from typing import Tuple
+import threading
+from psycopg_pool import ConnectionPool
+from typing import Callable, Iterator, Optional, Tuple
+
+from dbMigrations import ROLLUP_REBUILD, migrate
+from excelWriter import getExcelFromSessions
+from refNames import splitName
+from reports import TextSink, writeReport
+
+
+# connections are shared by every RefereeDbCockroach in the process, so a
+# Streamlit rerun (or another AuthManager) borrows an open connection
+# instead of doing a new TLS handshake with the database
+poolMinSize = int(os.environ.get('DB_POOL_MIN', '1'))
+poolMaxSize = int(os.environ.get('DB_POOL_MAX', '5'))
+# seconds an idle connection over poolMinSize is kept before it is closed
+poolMaxIdle = float(os.environ.get('DB_POOL_MAX_IDLE', '300'))
+
+_pool = None
+_poolLock = threading.Lock()
+
+# rows the reports fetch from the database at a time, see _streamRows
+reportBatchSize = int(os.environ.get('DB_REPORT_BATCH', '500'))
+
+# the schema version this process has seen, see dbMigrations
+_schemaVersion = None
+_schemaLock = threading.Lock()
+
+
+class IdCache(object):
+    """
+    Name -> id for referees or mentors, shared by the whole process.  Ids
+    don't change once a row exists so only names that were found are
+    kept, the least recently used go once there are maxSize of them.
+    """
+
+    def __init__(self, maxSize: int):
+        self._maxSize = maxSize
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key: tuple, lookup: Callable[[], Optional[int]]) -> Optional[int]:
+        with self._lock:
+            if key in self._ids:
+                self._ids.move_to_end(key)
+                self.hits += 1
+                return self._ids[key]
+            self.misses += 1
+
+        value = lookup()
+        if value is not None:
+            with self._lock:
+                self._ids[key] = value
+                self._ids.move_to_end(key)
+                while len(self._ids) > self._maxSize:
+                    self._ids.popitem(last=False)
+        return value
+
+
+    def invalidate(self, key: tuple) -> None:
+        with self._lock:
+            self._ids.pop(key, None)
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return { 'hits': self.hits, 'misses': self.misses, 'size': len(self._ids) }
+
+
+idCacheSize = int(os.environ.get('DB_ID_CACHE_SIZE', '2048'))
+refereeIds = IdCache(idCacheSize)
+mentorIds = IdCache(idCacheSize)
+
+
+def seasonOf(date: datetime) -> Tuple[int, str]:
+    """ (year, season) for a session date: fall is July to December, spring April to June """
+    if date.month >= 7:
+        return (date.year, 'fall')
+    if date.month >= 4:
+        return (date.year, 'spring')
+    # January to March was never counted in either season, keep it apart
+    return (date.year, 'winter')
+
+
+# one more session for (year, season, mentor, mentee), see dbMigrations migration 3
+_rollupSql = "INSERT INTO mentoring_rollup (year, season, mentor, mentee, sessions) VALUES (%s, %s, %s, %s, 1) \
+              ON CONFLICT (year, season, mentor, mentee) DO UPDATE SET sessions = mentoring_rollup.sessions + 1"
+
+
+def getPool() -> ConnectionPool:
+    """ The process wide pool, opened the first time somebody needs it """
+    global _pool
+
+    with _poolLock:
+        if _pool is None:
+            _pool = ConnectionPool(os.environ['db_url'],
+                                   min_size=poolMinSize,
+                                   max_size=max(poolMinSize, poolMaxSize),
+                                   max_idle=poolMaxIdle,
+                                   kwargs={ 'autocommit': True },
+                                   # no check on every checkout, that's a
+                                   # round trip per query.  A connection
+                                   # that breaks goes back to the pool
+                                   # broken and the pool replaces it
+                                   open=True)
+    return _pool
 
 
 class RefereeDbCockroach(object):
 
     def __init__(self):
-        self.connection = psycopg.connect(os.environ['db_url'])
-        self.connection.autocommit = True
-        self.cursor = self.connection.cursor()
-        self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='referees'")
-        if not self.cursor.fetchone()[0] == 1:
-            self.createDb()
-        else:
-            self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='gamedetails'")
-            if not self.cursor.fetchone()[0] == 1:
-                self._createNewGameDetailTable()
-
-            # for visitors, drop the old table and create the new one
-            # old table is 'visitors'
-            # new table is 'user_visits'
-            self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='visitors'")
-            if self.cursor.fetchone()[0] == 1:
-                self.cursor.execute(" DROP TABLE visitors")
-
-            self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='user_visits'")
-            if not self.cursor.fetchone()[0] == 1:
-                self._createUserVisitsTable()
-
-            self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='users'")
-            if not self.cursor.fetchone()[0] == 1:
-                self._createUsersTable()
-
-            self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='password_reset_tokens'")
-            if not self.cursor.fetchone()[0] == 1:
-                self._createPasswordResetTokensTable()
-
-            self.cursor.execute(" SELECT count(table_name) FROM information_schema.tables WHERE table_schema LIKE 'public' AND table_type LIKE 'BASE TABLE' AND table_name='logs'")
-            if not self.cursor.fetchone()[0] == 1:
-                self._createLogsTable()
-
-    def createDb(self) -> bool:
-
-        sql = """CREATE TABLE referees (id SERIAL PRIMARY KEY,
-                                        lastname TEXT NOT NULL,
-                                        firstname TEXT NOT NULL,
-                                        year_certified INTEGER)"""
-        self.cursor.execute(sql)
-
-        sql = """CREATE TABLE mentors (id SERIAL PRIMARY KEY,
-                                        mentor_last_name TEXT NOT NULL,
-                                        mentor_first_name TEXT NOT NULL)"""
-        self.cursor.execute(sql)
-
-        sql = """CREATE TABLE mentor_sessions (id SERIAL PRIMARY KEY,
-                                                mentor INTEGER NOT NULL,
-                                                mentee INTEGER NOT NULL,
-                                                position TEXT NOT NULL,
-                                                date TIMESTAMP NOT NULL,
-                                                comments TEXT NOT NULL)"""
-        self.cursor.execute(sql)
-
-        sql = """CREATE TABLE risky (id SERIAL PRIMARY KEY,
-                                     mentee INTEGER NOT NULL,
-                                     mentor_session INTEGER NOT NULL,
-                                     date TIMESTAMP NOT NULL DEFAULT NOW())"""
-        self.cursor.execute(sql)
-
-        self._createNewGameDetailTable()
-        self._createUserVisitsTable()
-        self._createUsersTable()
-        self._createPasswordResetTokensTable()
-        self._createLogsTable()
-
-
-    def _createNewGameDetailTable(self):
-            sql = """CREATE TABLE gamedetails ( id SERIAL PRIMARY KEY,
-                                                venue TEXT NOT NULL,
-                                                gameId TEXT NOT NULL,
-                                                center TEXT NOT NULL,
-                                                ar1 TEXT NOT NULL,
-                                                ar2 TEXT NOT NULL,
-                                                date text NOT NULL,
-                                                time TEXT NOT NULL,
-                                                age TEXT NOT NULL,
-                                                level TEXT NOT NULL)"""
-            self.cursor.execute(sql)
-
-
-    def _createUserVisitsTable(self):
-        sql = """CREATE TABLE user_visits (username TEXT NOT NULL,
-                                           role TEXT NOT NULL,
-                                           email TEXT NOT NULL,
-                                           date TIMESTAMP NOT NULL DEFAULT NOW())"""
-        self.cursor.execute(sql)
-
-
-    def _createUsersTable(self):
-        sql = """CREATE TABLE users (id SERIAL PRIMARY KEY,
-                                     username TEXT UNIQUE NOT NULL,
-                                     password_hash TEXT NOT NULL,
-                                     salt TEXT NOT NULL,
-                                     email TEXT UNIQUE NOT NULL,
-                                     role TEXT NOT NULL DEFAULT 'user',
-                                     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                                     last_login TIMESTAMP)"""
-        self.cursor.execute(sql)
-
-
-    def _createPasswordResetTokensTable(self):
-        sql = """CREATE TABLE password_reset_tokens (id SERIAL PRIMARY KEY,
-                                                     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                                                     token TEXT UNIQUE NOT NULL,
-                                                     expires_at TIMESTAMP NOT NULL,
-                                                     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                                                     used BOOLEAN NOT NULL DEFAULT FALSE)"""
-        self.cursor.execute(sql)
-
-
-    def _createLogsTable(self):
-        sql = """CREATE TABLE logs (timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
-                                    message TEXT NOT NULL)"""
-        self.cursor.execute(sql)
+        global _schemaVersion
+
+        # the schema only needs checking once per process, after that
+        # making a RefereeDbCockroach costs nothing
+        if _schemaVersion is None:
+            with _schemaLock:
+                if _schemaVersion is None:
+                    with self._cursor() as cursor:
+                        _schemaVersion = migrate(cursor)
+
+
+    @contextmanager
+    def _cursor(self) -> Iterator[psycopg.Cursor]:
+        """ A cursor on a connection borrowed from the pool for the with block """
+        with getPool().connection() as connection:
+            with connection.cursor() as cursor:
+                yield cursor
+
+
+    def _streamRows(self, sql: str, params: tuple = None) -> Iterator[tuple]:
+        """
+        The rows of sql, read from a server side cursor reportBatchSize at a
+        time, so a report over years of sessions never has them all in
+        memory.  The connection goes back to the pool when the rows run out
+        (or the generator is closed).
+        """
+        with getPool().connection() as connection:
+            # a server side cursor only lives as long as its transaction
+            with connection.transaction():
+                with connection.cursor(name='report_rows') as cursor:
+                    cursor.execute(sql, params)
+                    while True:
+                        rows = cursor.fetchmany(reportBatchSize)
+                        if len(rows) == 0:
+                            break
+                        yield from rows
 
 
     def addVisitor(self, email: str, username: str, role: str) -> None:
         sql = "INSERT INTO user_visits (email, username, role) values (%s, %s, %s)"
-        self.cursor.execute(sql, (email, username, role))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (email, username, role))
 
 
     def _getRiskRange(self) -> list:
@@ -149,11 +180,12 @@ class RefereeDbCockroach(object):
 
 
     def _removeRisky(self, mentee: str):
-        f, l = mentee.split(' ', 1)
-        menteeId = self.findReferee(l, f)
-        menteeId = 1
-        sql = f"DELETE FROM risky WHERE mentee = '{menteeId}'"
-        self.cursor.execute(sql)
+        menteeId = self._findMenteeId(mentee)
+        if menteeId is None:
+            return
+        sql = "DELETE FROM risky WHERE mentee = %s"
+        with self._cursor() as cursor:
+            cursor.execute(sql, (menteeId,))
 
 
     # finding stuff
@@ -165,36 +197,49 @@ class RefereeDbCockroach(object):
 
         range = self._getRiskRange()
 
-        mentee = self.findReferee(lastname, firstname)
-        if mentee is None:
+        menteeId = self.findRefereeId(lastname, firstname)
+        if menteeId is None:
             return False
 
-        menteeId = mentee[0]
-
         sql = f"SELECT * FROM risky WHERE mentee = {menteeId} and date between '{range[0]}' and '{range[1]}'"
-        r = self.cursor.execute(sql)
-
-        return len(r.fetchall()) > 0
+        with self._cursor() as cursor:
+            return len(cursor.execute(sql).fetchall()) > 0
 
 
     def getRisky(self) -> list:
         range = self._getRiskRange()
 
         sql = f"SELECT lastname, firstname from referees r where r.id in (SELECT mentee from risky where date between '{range[0]}' and '{range[1]}')"
-        r = self.cursor.execute(sql)
-        return r.fetchall()
+        with self._cursor() as cursor:
+            return cursor.execute(sql).fetchall()
 
 
     def refExists(self, lastname: str, firstname:str) -> bool:
         sql = "SELECT id from referees where lastname = %s and firstname = %s"
-        r = self.cursor.execute(sql, (lastname.lower(), firstname.lower()))
-        return len(r.fetchall()) == 1
+        with self._cursor() as cursor:
+            return len(cursor.execute(sql, (lastname.lower(), firstname.lower())).fetchall()) == 1
 
 
     def findReferee(self, lastname: str, firstname: str) -> list:
         sql = "SELECT * from referees where lastname = %s and firstname = %s"
-        r = self.cursor.execute(sql, (lastname.lower(), firstname.lower()))
-        return r.fetchone()
+        with self._cursor() as cursor:
+            return cursor.execute(sql, (lastname.lower(), firstname.lower())).fetchone()
+
+
+    def findRefereeId(self, lastname: str, firstname: str) -> Optional[int]:
+        """ findReferee()[0], from refereeIds when we have looked before """
+        def lookup():
+            referee = self.findReferee(lastname, firstname)
+            return None if referee is None else referee[0]
+        return refereeIds.get((lastname.lower(), firstname.lower()), lookup)
+
+
+    def _findMenteeId(self, mentee: str) -> Optional[int]:
+        """ findRefereeId() for a name the way MSL shows it, None if it isn't anybody """
+        firstname, lastname = splitName(mentee)
+        if firstname is None or lastname == '':
+            return None
+        return self.findRefereeId(lastname, firstname)
 
 
     def getReferees(self) -> list:
@@ -204,8 +249,8 @@ class RefereeDbCockroach(object):
             return item[1]
 
         sql = "select distinct firstname, lastname from referees r join mentor_sessions ms on ms.mentee = r.id"
-        r = self.cursor.execute(sql)
-        data = r.fetchall()
+        with self._cursor() as cursor:
+            data = cursor.execute(sql).fetchall()
         return sorted(data, key=lastname)
 
 
@@ -229,26 +274,38 @@ class RefereeDbCockroach(object):
         today = datetime.today()
         year = today.year
         sql = "SELECT firstname, lastname from referees where year_certified >= %s"
-        r = self.cursor.execute(sql, (year,))
-        return r.fetchall()
+        with self._cursor() as cursor:
+            return cursor.execute(sql, (year,)).fetchall()
 
 
     def mentorExists(self, firstname: str, lastname:str) -> bool:
         sql = "SELECT id from mentors where mentor_last_name = %s and mentor_first_name = %s"
-        r = self.cursor.execute(sql, (lastname.lower(), firstname.lower()))
-        return len(r.fetchall()) == 1
+        with self._cursor() as cursor:
+            return len(cursor.execute(sql, (lastname.lower(), firstname.lower())).fetchall()) == 1
 
 
     def findMentor(self, firstname: str, lastname: str) -> list:
         sql = "SELECT * from mentors where mentor_last_name = %s and mentor_first_name = %s"
-        r = self.cursor.execute(sql, (lastname.lower(), firstname.lower()))
-        return r.fetchone()
+        with self._cursor() as cursor:
+            return cursor.execute(sql, (lastname.lower(), firstname.lower())).fetchone()
+
+
+    def findMentorId(self, firstname: str, lastname: str) -> Optional[int]:
+        """ findMentor()[0], from mentorIds when we have looked before """
+        def lookup():
+            mentor = self.findMentor(firstname, lastname)
+            return None if mentor is None else mentor[0]
+        return mentorIds.get((firstname.lower(), lastname.lower()), lookup)
+
+
+    def idCacheStats(self) -> dict:
+        return { 'referees': refereeIds.stats(), 'mentors': mentorIds.stats() }
 
 
     def getMentors(self) -> list:
         sql = "SELECT mentor_first_name, mentor_last_name from mentors"
-        r = self.cursor.execute(sql)
-        return r.fetchall()
+        with self._cursor() as cursor:
+            return cursor.execute(sql).fetchall()
 
 
     # def getMentoringSessions(self) -> dict:
@@ -266,27 +323,20 @@ class RefereeDbCockroach(object):
 
     def getMentoringSessionMetrics(self, year: int, season: str) -> dict:
         '''
-        season is either 'fall' or 'spring'
+        season is 'fall', 'spring' (or 'winter', see seasonOf)
         returns number of referees mentored and number of mentoring sessions
         '''
-
-        def getRanges(season: str, year: int) -> list:
-            if season == 'fall':
-                return [f'{year}-07-01', f'{year}-12-31']
-            else:
-                return [f'{year}-04-01', f'{year}-06-30']
-
-        range = getRanges(season, year)
-        sql = f"""
+        # from the rollup, a row per mentor and mentee in the season
+        sql = """
             SELECT
-            COUNT(DISTINCT ms.mentor) AS distinct_mentors,
-            COUNT(DISTINCT ms.mentee) AS distinct_referees,
-            COUNT(DISTINCT ms.id) AS distinct_reports
-            FROM mentor_sessions ms
-            WHERE ms.date BETWEEN '{range[0]}' AND '{range[1]}'
+            COUNT(DISTINCT mentor) AS distinct_mentors,
+            COUNT(DISTINCT mentee) AS distinct_referees,
+            COALESCE(SUM(sessions), 0) AS distinct_reports
+            FROM mentoring_rollup
+            WHERE year = %s AND season = %s
         """
-        r = self.cursor.execute(sql)
-        data =  r.fetchall()
+        with self._cursor() as cursor:
+            data = cursor.execute(sql, (year, season)).fetchall()
         retVal = {
             'mentors': data[0][0],
             'referees': data[0][1],
@@ -295,6 +345,15 @@ class RefereeDbCockroach(object):
         return retVal
 
 
+    def rebuildMentoringRollup(self) -> int:
+        """ Work mentoring_rollup out again from mentor_sessions, returns its rows """
+        with self._cursor() as cursor:
+            with cursor.connection.transaction():
+                cursor.execute("DELETE FROM mentoring_rollup")
+                cursor.execute(ROLLUP_REBUILD)
+                return cursor.rowcount
+
+
     def getMentoringSessions(self) -> dict:
 
         range = self._getSeasonRange()
@@ -302,8 +361,8 @@ class RefereeDbCockroach(object):
         retVal = {}
         # sql = f"select r.lastname, r.firstname, ms.position from mentor_sessions ms join referees r on ms.mentee = r.id where ms.date between '{range[0]}' and '{range[1]}'"
         sql = f"select r.lastname, r.firstname, ms.position from mentor_sessions ms join referees r on ms.mentee = r.id"
-        r = self.cursor.execute(sql)
-        rows = r.fetchall()
+        with self._cursor() as cursor:
+            rows = cursor.execute(sql).fetchall()
         for row in rows:
             key = f'{row[1]} {row[0]}'
             if key not in retVal:
@@ -312,57 +371,45 @@ class RefereeDbCockroach(object):
         return retVal
 
 
-    def getMentoringSessionDetails(self, year: int) -> dict:
+    # the report queries, every row is
+    # (firstname, lastname, position, date, comments, mentor_last_name, mentor_first_name)
+    _sessionsSql = "select r.firstname, r.lastname, ms.position, ms.date, ms.comments, me.mentor_last_name, me.mentor_first_name \
+                    from mentor_sessions ms \
+                    join referees r on ms.mentee = r.id join mentors me on ms.mentor = me.id"
+
+    def getMentoringSessionDetails(self, year: int) -> Iterator[tuple]:
 
         range = [f'{year}-01-01', f'{year}-12-31']
-        sql = f"select r.firstname, r.lastname, ms.position, ms.date, ms.comments, me.mentor_last_name, me.mentor_first_name \
-              from mentor_sessions ms \
-              join referees r on ms.mentee = r.id join mentors me on ms.mentor = me.id \
-              where ms.date between '{range[0]}' and '{range[1]}' ORDER BY ms.date"
-        r = self.cursor.execute(sql)
-        return r.fetchall()
+        sql = f"{self._sessionsSql} where ms.date between %s and %s ORDER BY ms.date"
+        return self._streamRows(sql, (range[0], range[1]))
 
 
-    def getMentoringsessionsForWeek(self, week: str) -> dict:
+    def getMentoringsessionsForWeek(self, week: str) -> Iterator[tuple]:
         # week string is like "Friday, April 14, 2023"
         d = datetime.strptime(week, "%A, %B %d, %Y")
         dt = d.strftime("%Y-%m-%d")
-        sql = f"select r.firstname, r.lastname, ms.position, ms.date, ms.comments, me.mentor_last_name, me.mentor_first_name \
-              from mentor_sessions ms \
-              join referees r on ms.mentee = r.id join mentors me on ms.mentor = me.id \
-              where ms.date = '{dt}'"
-        r = self.cursor.execute(sql)
-        return r.fetchall()
+        sql = f"{self._sessionsSql} where ms.date = %s order by ms.date"
+        return self._streamRows(sql, (dt,))
 
 
-    def getMentoringsessionsForReferee(self, referee: str) -> dict:
+    def getMentoringsessionsForReferee(self, referee: str) -> Iterator[tuple]:
         # referee string is like "Kate Curby"
         firstname, lastname = referee.split(' ', 1)
-        sql = f"select r.firstname, r.lastname, ms.position, ms.date, ms.comments, me.mentor_last_name, me.mentor_first_name \
-              from mentor_sessions ms \
-              join referees r on ms.mentee = r.id join mentors me on ms.mentor = me.id \
-              where r.firstname = '{firstname.lower()}' and r.lastname = '{lastname.lower()}' \
-              order by ms.date"
-        r = self.cursor.execute(sql)
-        return r.fetchall()
+        sql = f"{self._sessionsSql} where r.firstname = %s and r.lastname = %s order by ms.date"
+        return self._streamRows(sql, (firstname.lower(), lastname.lower()))
 
 
-    def getMentoringsessionsForMentor(self, mentor: str) -> dict:
+    def getMentoringsessionsForMentor(self, mentor: str) -> Iterator[tuple]:
         # mentor string is like "David Helfgott"
         firstname, lastname = mentor.split(' ', 1)
-        sql = f"select r.firstname, r.lastname, ms.position, ms.date, ms.comments, me.mentor_last_name, me.mentor_first_name \
-              from mentor_sessions ms \
-              join referees r on ms.mentee = r.id join mentors me on ms.mentor = me.id \
-              where me.mentor_first_name = '{firstname.lower()}' and me.mentor_last_name = '{lastname.lower()}' \
-              order by ms.date"
-        r = self.cursor.execute(sql)
-        return r.fetchall()
+        sql = f"{self._sessionsSql} where me.mentor_first_name = %s and me.mentor_last_name = %s order by ms.date"
+        return self._streamRows(sql, (firstname.lower(), lastname.lower()))
 
     def getYears(self) -> list:
         retVal = []
         sql = 'SELECT DISTINCT date from mentor_sessions'
-        r = self.cursor.execute(sql)
-        data = r.fetchall()
+        with self._cursor() as cursor:
+            data = cursor.execute(sql).fetchall()
         for d in data:
             if d[0].year not in retVal:
                 retVal.append(d[0].year)
@@ -373,22 +420,49 @@ class RefereeDbCockroach(object):
     def setIsRisky(self, mentee: int, mentorSession: int, dt: datetime):
         sql = "INSERT into risky (mentee, mentor_session, date) \
                VALUES (%s, %s, %s)"
-        self.cursor.execute(sql, (mentee, mentorSession, dt))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (mentee, mentorSession, dt))
 
 
     def addReferee(self, lastname: str, firstname: str, year: int):
         sql = "INSERT INTO referees (lastname, firstname, year_certified) \
                VALUES (%s, %s, %s)"
-        self.cursor.execute(sql, (lastname, firstname, year))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (lastname, firstname, year))
+        refereeIds.invalidate((lastname.lower(), firstname.lower()))
+
+
+    def syncReferees(self, referees: list) -> list:
+        """
+        Add the referees (lastname, firstname, year_certified) that aren't
+        in the database yet: one query for the names we have, one insert
+        for the ones we don't.  Returns the referees that were added.
+        """
+        with self._cursor() as cursor:
+            existing = set(cursor.execute("SELECT lastname, firstname from referees").fetchall())
+
+            newRefs = []
+            for lastname, firstname, year in referees:
+                key = (lastname.lower(), firstname.lower())
+                if key not in existing:
+                    # the sheet can have somebody twice
+                    existing.add(key)
+                    newRefs.append((lastname, firstname, year))
+
+            if len(newRefs) > 0:
+                # a single statement, so all of them go in or none do
+                values = ', '.join(['(%s, %s, %s)'] * len(newRefs))
+                sql = f"INSERT INTO referees (lastname, firstname, year_certified) VALUES {values}"
+                cursor.execute(sql, [value for ref in newRefs for value in ref])
+        return newRefs
 
 
     def addMentor(self, firstname: str, lastname: str) -> None:
         sql = "INSERT INTO mentors (mentor_last_name, mentor_first_name) \
                VALUES (%s, %s)"
-        self.cursor.execute(sql, (lastname, firstname))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (lastname, firstname))
+        mentorIds.invalidate((firstname.lower(), lastname.lower()))
 
 
     def addMentorSession(self,
@@ -399,9 +473,8 @@ class RefereeDbCockroach(object):
                          comments: str) -> Tuple[bool, str]:
         sql = 'INSERT INTO mentor_sessions (mentor, mentee, position, date, comments) \
                VALUES (%s, %s, %s, %s, %s)'
-        f, l = mentee.split(' ', 1)
-        mentorId = self.findMentor(mentor.split(' ')[0], mentor.split(' ')[1])
-        menteeId = self.findReferee(l, f)
+        mentorId = self.findMentorId(mentor.split(' ')[0], mentor.split(' ')[1])
+        menteeId = self._findMenteeId(mentee)
         if mentorId is None:
             return (False, f'Could not find mentor details for {mentor}')
         if menteeId is None:
@@ -410,16 +483,18 @@ class RefereeDbCockroach(object):
         dt = datetime.strptime(date, "%A, %B %d, %Y")
 
         try:
-            self.cursor.execute(sql,
-                                [mentorId[0],
-                                menteeId[0],
-                                position,
-                                dt,
-                                comments])
+            with self._cursor() as cursor:
+                with cursor.connection.transaction():
+                    cursor.execute(sql,
+                                   [mentorId,
+                                   menteeId,
+                                   position,
+                                   dt,
+                                   comments])
+                    cursor.execute(_rollupSql, seasonOf(dt) + (mentorId, menteeId))
         except Exception as ex:
             return (False, f'Failed to add mentor report: {ex}')
         else:
-            self.connection.commit()
             return (True, "Mentor Report successfully submitted!")
 
 
@@ -430,106 +505,145 @@ class RefereeDbCockroach(object):
                             date: str,
                             comments: str,
                             isRisky: bool) -> Tuple[bool, str]:
-        if not isRisky:
-            self._removeRisky(mentee)
-            return self.addMentorSession(mentor, mentee, position, date, comments)
+        _, status, message = self.addMentorSessions(mentor, [(mentee, position, isRisky)], date, comments)[0]
+        return (status, message)
 
 
-        sql = 'INSERT INTO mentor_sessions (mentor, mentee, position, date, comments) \
-               VALUES (%s, %s, %s, %s, %s) RETURNING id'
-        f, l = mentee.split(' ', 1)
-        mentorId = self.findMentor(mentor.split(' ')[0], mentor.split(' ')[1])
-        menteeId = self.findReferee(l, f)
+    def addMentorSessions(self,
+                          mentor: str,
+                          mentees: list,
+                          date: str,
+                          comments: str) -> list:
+        """
+        Save one mentor report for every referee on it.  mentees is a list
+        of (mentee, position, isRisky).  The sessions, risky flags and
+        mentoring_rollup counts are written in one transaction and sent in
+        one round trip, so the report goes in whole or not at all.  Returns
+        (mentee, ok, message) for each of them, a referee we can't find
+        fails on its own.
+        """
+        mentorId = self.findMentorId(mentor.split(' ')[0], mentor.split(' ')[1])
         if mentorId is None:
-            return (False, f'Could not find mentor details for {mentor}')
-        if menteeId is None:
-            return (False, f'Could not find referee details for {mentee}')
+            return [(mentee, False, f'Could not find mentor details for {mentor}') for mentee, _, _ in mentees]
 
         dt = datetime.strptime(date, "%A, %B %d, %Y")
 
+        results = []
+        found = []
+        for mentee, position, isRisky in mentees:
+            menteeId = self._findMenteeId(mentee)
+            if menteeId is None:
+                results.append((mentee, False, f'Could not find referee details for {mentee}'))
+            else:
+                results.append(None)
+                found.append((len(results) - 1, mentee, menteeId, position, isRisky))
+
+        if len(found) == 0:
+            return results
+
+        insert = 'INSERT INTO mentor_sessions (mentor, mentee, position, date, comments) \
+                  VALUES (%s, %s, %s, %s, %s)'
+        # the risky flag needs the new session's id, take it from the insert
+        # so the statement doesn't have to wait for an answer
+        insertRisky = f'WITH session AS ({insert} RETURNING id) \
+                        INSERT INTO risky (mentee, mentor_session, date) SELECT %s, id, %s FROM session'
         try:
-            self.cursor.execute(sql,
-                                [mentorId[0],
-                                menteeId[0],
-                                position,
-                                dt,
-                                comments])
-            newId = self.cursor.fetchone()[0]
-
+            with self._cursor() as cursor:
+                connection = cursor.connection
+                # pipeline mode sends every statement (BEGIN and COMMIT too)
+                # without waiting for the one before it
+                with connection.pipeline(), connection.transaction():
+                    for _, mentee, menteeId, position, isRisky in found:
+                        session = [mentorId, menteeId, position, dt, comments]
+                        if isRisky:
+                            cursor.execute(insertRisky, session + [menteeId, dt])
+                        else:
+                            cursor.execute("DELETE FROM risky WHERE mentee = %s", (menteeId,))
+                            cursor.execute(insert, session)
+                        cursor.execute(_rollupSql, seasonOf(dt) + (mentorId, menteeId))
         except Exception as ex:
-            return (False, f'Failed to add mentor report: {ex}')
+            for index, mentee, _, _, _ in found:
+                results[index] = (mentee, False, f'Failed to add mentor report: {ex}')
         else:
-            self.connection.commit()
-            self.setIsRisky(menteeId[0], newId, dt)
-            return (True, "Mentor Report successfully submitted!")
-
-    def _getTextFromSessions(self, sessions):
-        retVal = ''
-        # [0] is firstname, [1] is lastname, [2] is position
-        # [3] is date and [4] is comments
-        sessionData = {}
-
-        for session in sessions:
-            date = session[3]
-            if date not in sessionData: # session[3] is date
-                sessionData[date] = []
-
-            sessionData[date].append(
-                {
-                    'ref': f'{session[0].capitalize()} {session[1].capitalize()}',
-                    'position': session[2],
-                    'mentor': f'{session[6].capitalize()} {session[5].capitalize()}',
-                    'comments': session[4]
-                })
-
-        # build a big `ol string to returned as a download`
-        for k, entries in sessionData.items():
-            retVal += f'Date: {k}\r\n'
-            for entry in entries:
-                retVal += f"\tReferee: {entry['ref']}\r\n"
-                retVal += f"\tPosition: {entry['position']}\r\n"
-                retVal += f"\tMentor: {entry['mentor']}\r\n"
-                retVal += f"\tComments: {entry['comments']}\r\n\r\n"
+            for index, mentee, _, _, _ in found:
+                results[index] = (mentee, True, "Mentor Report successfully submitted!")
+        return results
 
-        return retVal
+    def _produceReport(self, sessions: Iterator[tuple], reportType):
+        # written a date at a time as the rows come in, the queries all
+        # sort by date.  Excel reports are the spreadsheet's bytes
+        if reportType == 'Excel':
+            return getExcelFromSessions(sessions)
+        out = StringIO()
+        writeReport(sessions, TextSink(out))
+        return out.getvalue()
 
 
     def produceYearReport(self, year, reportType):
         sessions = self.getMentoringSessionDetails(year)
-        return self._getTextFromSessions(sessions)
+        return self._produceReport(sessions, reportType)
 
 
     def produceWeekReport(self, week, reportType):
         sessions = self.getMentoringsessionsForWeek(week)
-        return self._getTextFromSessions(sessions)
+        return self._produceReport(sessions, reportType)
 
 
     def produceRefereeReport(self, referee, reportType):
         for name in referee:
             name.lower()
         sessions = self.getMentoringsessionsForReferee(referee)
-        return self._getTextFromSessions(sessions)
+        return self._produceReport(sessions, reportType)
 
 
     def produceMentorReport(self, mentor, reportType):
         sessions = self.getMentoringsessionsForMentor(mentor)
-        return self._getTextFromSessions(sessions)
+        return self._produceReport(sessions, reportType)
 
 
     # The below was added so we can also track the game details
 
     def gameDetailsExist(self, gameId: str, date: str, time: str) -> bool:
         sql = "SELECT * from gamedetails where gameId = %s and date = %s and time = %s"
-        try:
-            self.cursor.execute(sql, (gameId, date, time))
-        except Exception as ex:
-            print(ex)
-        return not self.cursor.fetchone() == None
+        with self._cursor() as cursor:
+            try:
+                cursor.execute(sql, (gameId, date, time))
+            except Exception as ex:
+                print(ex)
+                return False
+            return not cursor.fetchone() == None
 
 
-    def addGameDetails(self, currentGames: dict) -> None:
-
-        sql = """insert into gamedetails (venue,
+    def addGameDetails(self, currentGames: dict) -> Tuple[int, int]:
+        """
+        Store the games of a weekend (getAssignments) that aren't stored
+        yet.  Returns how many games were inserted and how many were
+        already there.
+        """
+        rows = {}
+        for venue, gameDetails in currentGames.items():
+            for gameid, game in gameDetails.items():
+                if 'VENUE CONFLICT' in gameid:
+                    gameid = gameid.replace('VENUE CONFLICT', '')
+                # the unique key, a game listed twice is only sent once
+                key = (gameid, game['date'], game['gameTime'])
+                if key not in rows:
+                    rows[key] = (venue,
+                                 gameid,
+                                 game['Center'],
+                                 game['AR1'],
+                                 game['AR2'],
+                                 game['date'],
+                                 game['gameTime'],
+                                 game['age'],
+                                 game['level'])
+        if len(rows) == 0:
+            return 0, 0
+
+        # one statement for the weekend, the unique index on
+        # (gameId, date, time) skips the games we already have
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+        sql = f"""insert into gamedetails (venue,
                                     gameId,
                                     center,
                                     ar1,
@@ -538,22 +652,14 @@ class RefereeDbCockroach(object):
                                     time,
                                     age,
                                     level)
-        values (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+        values {values}
+        on conflict (gameId, date, time) do nothing
+        returning id"""
 
-        for venue, gameDetails in currentGames.items():
-            for gameid, game in gameDetails.items():
-                if 'VENUE CONFLICT' in gameid:
-                    gameid = gameid.replace('VENUE CONFLICT', '')
-                if self.gameDetailsExist(gameid, game['date'], game['gameTime']) is False:
-                    self.cursor.execute(sql, (venue,
-                                            gameid,
-                                            game['Center'],
-                                            game['AR1'],
-                                            game['AR2'],
-                                            game['date'],
-                                            game['gameTime'],
-                                            game['age'],
-                                            game['level']))
+        params = [value for row in rows.values() for value in row]
+        with self._cursor() as cursor:
+            inserted = len(cursor.execute(sql, params).fetchall())
+        return inserted, len(rows) - inserted
 
 
     # User management methods for authentication
@@ -561,29 +667,29 @@ class RefereeDbCockroach(object):
     def userExists(self, username: str) -> bool:
         """Check if a username already exists"""
         sql = "SELECT id FROM users WHERE username = %s"
-        self.cursor.execute(sql, (username.lower(),))
-        return self.cursor.fetchone() is not None
+        with self._cursor() as cursor:
+            return cursor.execute(sql, (username.lower(),)).fetchone() is not None
 
 
     def emailExists(self, email: str) -> bool:
         """Check if an email already exists"""
         sql = "SELECT id FROM users WHERE email = %s"
-        self.cursor.execute(sql, (email.lower(),))
-        return self.cursor.fetchone() is not None
+        with self._cursor() as cursor:
+            return cursor.execute(sql, (email.lower(),)).fetchone() is not None
 
 
     def createUser(self, username: str, password_hash: str, salt: str, email: str, role: str = 'user') -> None:
         """Create a new user"""
         sql = "INSERT INTO users (username, password_hash, salt, email, role) VALUES (%s, %s, %s, %s, %s)"
-        self.cursor.execute(sql, (username.lower(), password_hash, salt, email.lower(), role))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (username.lower(), password_hash, salt, email.lower(), role))
 
 
     def getUserByUsername(self, username: str) -> dict:
         """Get user by username"""
         sql = "SELECT id, username, password_hash, salt, email, role, created_at, last_login FROM users WHERE username = %s"
-        self.cursor.execute(sql, (username.lower(),))
-        row = self.cursor.fetchone()
+        with self._cursor() as cursor:
+            row = cursor.execute(sql, (username.lower(),)).fetchone()
         if row:
             return {
                 'id': row[0],
@@ -601,8 +707,8 @@ class RefereeDbCockroach(object):
     def getAllUsers(self) -> list:
         """Get all users"""
         sql = "SELECT id, username, email, role, created_at, last_login FROM users ORDER BY username"
-        self.cursor.execute(sql)
-        rows = self.cursor.fetchall()
+        with self._cursor() as cursor:
+            rows = cursor.execute(sql).fetchall()
         users = []
         for row in rows:
             users.append({
@@ -619,29 +725,29 @@ class RefereeDbCockroach(object):
     def updateUserPassword(self, username: str, password_hash: str, salt: str) -> None:
         """Update user password"""
         sql = "UPDATE users SET password_hash = %s, salt = %s WHERE username = %s"
-        self.cursor.execute(sql, (password_hash, salt, username.lower()))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (password_hash, salt, username.lower()))
 
 
     def updateLastLogin(self, username: str) -> None:
         """Update user's last login time"""
         sql = "UPDATE users SET last_login = NOW() WHERE username = %s"
-        self.cursor.execute(sql, (username.lower(),))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (username.lower(),))
 
 
     def deleteUser(self, user_id: int) -> None:
         """Delete a user"""
         sql = "DELETE FROM users WHERE id = %s"
-        self.cursor.execute(sql, (user_id,))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (user_id,))
 
 
     def getUserByEmail(self, email: str) -> dict:
         """Get user by email address"""
         sql = "SELECT id, username, password_hash, salt, email, role, created_at, last_login FROM users WHERE email = %s"
-        self.cursor.execute(sql, (email.lower(),))
-        row = self.cursor.fetchone()
+        with self._cursor() as cursor:
+            row = cursor.execute(sql, (email.lower(),)).fetchone()
         if row:
             return {
                 'id': row[0],
@@ -660,12 +766,12 @@ class RefereeDbCockroach(object):
         """Create a password reset token"""
         # First, invalidate any existing tokens for this user
         sql = "UPDATE password_reset_tokens SET used = TRUE WHERE user_id = %s AND used = FALSE"
-        self.cursor.execute(sql, (user_id,))
+        with self._cursor() as cursor:
+            cursor.execute(sql, (user_id,))
 
-        # Create the new token
-        sql = "INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (%s, %s, %s)"
-        self.cursor.execute(sql, (user_id, token, expires_at))
-        self.connection.commit()
+            # Create the new token
+            sql = "INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (%s, %s, %s)"
+            cursor.execute(sql, (user_id, token, expires_at))
 
 
     def getPasswordResetToken(self, token: str, current_email: str) -> dict:
@@ -681,8 +787,8 @@ class RefereeDbCockroach(object):
         #row = self.cursor.fetchone()
         #self.cursor.execute('insert into logs (message) values (%s)', (f'Current time is {row[0]}',))
 
-        self.cursor.execute(sql, (token, current_email))
-        row = self.cursor.fetchone()
+        with self._cursor() as cursor:
+            row = cursor.execute(sql, (token, current_email)).fetchone()
         if row:
             return {
                 'id': row[0],
@@ -699,8 +805,8 @@ class RefereeDbCockroach(object):
     def getUsernameByResetToken(self, token: str) -> str:
         """Get username associated with a valid password reset token"""
         sql = "select u.email from password_reset_tokens prt JOIN users u on prt.user_id = u.id where prt.token = %s and prt.used = false and prt.expires_at < NOW()"
-        self.cursor.execute(sql, (token,))
-        row = self.cursor.fetchone()
+        with self._cursor() as cursor:
+            row = cursor.execute(sql, (token,)).fetchone()
         if row:
             return row[0]
         return None
@@ -709,21 +815,21 @@ class RefereeDbCockroach(object):
     def usePasswordResetToken(self, token: str) -> None:
         """Mark a password reset token as used"""
         sql = "UPDATE password_reset_tokens SET used = TRUE WHERE token = %s"
-        self.cursor.execute(sql, (token,))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (token,))
 
 
     def cleanupExpiredTokens(self) -> None:
         """Remove expired password reset tokens"""
         sql = "DELETE FROM password_reset_tokens WHERE expires_at < NOW() OR used = TRUE"
-        self.cursor.execute(sql)
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql)
 
 
     def logMessage(self, message: str) -> None:
         """Log a message to the logs table"""
         sql = "INSERT INTO logs (message) VALUES (%s)"
-        self.cursor.execute(sql, (message,))
-        self.connection.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (message,))
 
 
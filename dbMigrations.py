@@ -0,0 +1,199 @@
+import argparse
+import sys
+
+import psycopg
+
+"""
+The schema of the CockroachDB database, as an ordered list of migrations.
+
+The schema_version table records which migrations a database has had.
+migrate() applies the ones it is missing, in order, and RefereeDbCockroach
+runs it once per process.  To change the schema add a migration to the
+end of MIGRATIONS; never edit one that has already been deployed.
+"""
+
+# the season a mentor_sessions date falls in, see database.seasonOf
+SEASON_SQL = """CASE WHEN EXTRACT(MONTH FROM ms.date) >= 7 THEN 'fall'
+                     WHEN EXTRACT(MONTH FROM ms.date) >= 4 THEN 'spring'
+                     ELSE 'winter' END"""
+
+# mentoring_rollup worked out from scratch, for migration 3 and
+# RefereeDbCockroach.rebuildMentoringRollup
+ROLLUP_REBUILD = f"""INSERT INTO mentoring_rollup (year, season, mentor, mentee, sessions)
+                     SELECT EXTRACT(YEAR FROM ms.date)::INTEGER, {SEASON_SQL}, ms.mentor, ms.mentee, COUNT(*)
+                     FROM mentor_sessions ms
+                     GROUP BY 1, 2, 3, 4
+                     ON CONFLICT (year, season, mentor, mentee) DO UPDATE SET sessions = excluded.sessions"""
+
+# (version, description, statements)
+MIGRATIONS = [
+    (1, 'baseline: the tables createDb used to create', [
+        """CREATE TABLE IF NOT EXISTS referees (id SERIAL PRIMARY KEY,
+                                                lastname TEXT NOT NULL,
+                                                firstname TEXT NOT NULL,
+                                                year_certified INTEGER)""",
+        """CREATE TABLE IF NOT EXISTS mentors (id SERIAL PRIMARY KEY,
+                                               mentor_last_name TEXT NOT NULL,
+                                               mentor_first_name TEXT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS mentor_sessions (id SERIAL PRIMARY KEY,
+                                                       mentor INTEGER NOT NULL,
+                                                       mentee INTEGER NOT NULL,
+                                                       position TEXT NOT NULL,
+                                                       date TIMESTAMP NOT NULL,
+                                                       comments TEXT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS risky (id SERIAL PRIMARY KEY,
+                                             mentee INTEGER NOT NULL,
+                                             mentor_session INTEGER NOT NULL,
+                                             date TIMESTAMP NOT NULL DEFAULT NOW())""",
+        """CREATE TABLE IF NOT EXISTS gamedetails (id SERIAL PRIMARY KEY,
+                                                   venue TEXT NOT NULL,
+                                                   gameId TEXT NOT NULL,
+                                                   center TEXT NOT NULL,
+                                                   ar1 TEXT NOT NULL,
+                                                   ar2 TEXT NOT NULL,
+                                                   date text NOT NULL,
+                                                   time TEXT NOT NULL,
+                                                   age TEXT NOT NULL,
+                                                   level TEXT NOT NULL)""",
+        # visitors was replaced by user_visits
+        """DROP TABLE IF EXISTS visitors""",
+        """CREATE TABLE IF NOT EXISTS user_visits (username TEXT NOT NULL,
+                                                   role TEXT NOT NULL,
+                                                   email TEXT NOT NULL,
+                                                   date TIMESTAMP NOT NULL DEFAULT NOW())""",
+        """CREATE TABLE IF NOT EXISTS users (id SERIAL PRIMARY KEY,
+                                             username TEXT UNIQUE NOT NULL,
+                                             password_hash TEXT NOT NULL,
+                                             salt TEXT NOT NULL,
+                                             email TEXT UNIQUE NOT NULL,
+                                             role TEXT NOT NULL DEFAULT 'user',
+                                             created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                                             last_login TIMESTAMP)""",
+        """CREATE TABLE IF NOT EXISTS password_reset_tokens (id SERIAL PRIMARY KEY,
+                                                             user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                                                             token TEXT UNIQUE NOT NULL,
+                                                             expires_at TIMESTAMP NOT NULL,
+                                                             created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                                                             used BOOLEAN NOT NULL DEFAULT FALSE)""",
+        """CREATE TABLE IF NOT EXISTS logs (timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+                                            message TEXT NOT NULL)""",
+    ]),
+    (2, 'indexes for the lookups the app does all the time', [
+        # findReferee/refExists and findMentor.  Not unique, older rosters
+        # have the odd referee in twice and sessions point at both rows
+        """CREATE INDEX IF NOT EXISTS referees_name_idx ON referees (lastname, firstname)""",
+        """CREATE INDEX IF NOT EXISTS mentors_name_idx ON mentors (mentor_last_name, mentor_first_name)""",
+        # the reports
+        """CREATE INDEX IF NOT EXISTS mentor_sessions_date_idx ON mentor_sessions (date)""",
+        """CREATE INDEX IF NOT EXISTS mentor_sessions_mentee_idx ON mentor_sessions (mentee)""",
+        """CREATE INDEX IF NOT EXISTS mentor_sessions_mentor_idx ON mentor_sessions (mentor)""",
+        # isRisky and getRisky
+        """CREATE INDEX IF NOT EXISTS risky_mentee_date_idx ON risky (mentee, date)""",
+        """CREATE INDEX IF NOT EXISTS risky_date_idx ON risky (date)""",
+        # gameDetailsExist, a game is only stored once.  Drop any copies a
+        # race between two runs of main.py left behind first
+        """DELETE FROM gamedetails a USING gamedetails b
+           WHERE a.gameId = b.gameId AND a.date = b.date AND a.time = b.time AND a.id > b.id""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS gamedetails_game_idx ON gamedetails (gameId, date, time)""",
+    ]),
+    (3, 'mentoring sessions per season, mentor and mentee', [
+        # kept up to date as sessions are added, so getMentoringSessionMetrics
+        # reads a season's handful of rows instead of counting every session
+        """CREATE TABLE IF NOT EXISTS mentoring_rollup (year INTEGER NOT NULL,
+                                                        season TEXT NOT NULL,
+                                                        mentor INTEGER NOT NULL,
+                                                        mentee INTEGER NOT NULL,
+                                                        sessions INTEGER NOT NULL,
+                                                        PRIMARY KEY (year, season, mentor, mentee))""",
+        ROLLUP_REBUILD,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schemaVersion(cursor: psycopg.Cursor) -> int:
+    """ The last migration applied to the database, 0 if none ever was """
+    try:
+        return cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    except psycopg.errors.UndefinedTable:
+        return 0
+
+
+def migrate(cursor: psycopg.Cursor) -> int:
+    """ Apply the migrations the database doesn't have yet, returns its version """
+    version = schemaVersion(cursor)
+    if version >= LATEST_VERSION:
+        return version
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY,
+                                                                 description TEXT NOT NULL,
+                                                                 applied_at TIMESTAMP NOT NULL DEFAULT NOW())""")
+    for number, description, statements in MIGRATIONS:
+        if number <= version:
+            continue
+        # every statement can be run again, so two processes starting at
+        # the same time on a new deploy don't trip over each other
+        for sql in statements:
+            cursor.execute(sql)
+        cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s) ON CONFLICT (version) DO NOTHING",
+                       (number, description))
+        print(f'Applied database migration {number}: {description}')
+        version = number
+    return version
+
+
+# the lookups the indexes above are for, with made up values, see fullScans
+HOT_QUERIES = {
+    'findReferee': "SELECT * FROM referees WHERE lastname = 'cooley' AND firstname = 'martin'",
+    'findMentor': "SELECT * FROM mentors WHERE mentor_last_name = 'cooley' AND mentor_first_name = 'martin'",
+    'sessionsForDate': "SELECT * FROM mentor_sessions WHERE date = '2025-09-13'",
+    'sessionsForYear': "SELECT * FROM mentor_sessions WHERE date BETWEEN '2025-01-01' AND '2025-12-31'",
+    'sessionsForMentee': "SELECT * FROM mentor_sessions WHERE mentee = 1",
+    'sessionsForMentor': "SELECT * FROM mentor_sessions WHERE mentor = 1",
+    'isRisky': "SELECT * FROM risky WHERE mentee = 1 AND date BETWEEN '2025-09-01' AND '2025-10-01'",
+    'getRisky': "SELECT mentee FROM risky WHERE date BETWEEN '2025-09-01' AND '2025-10-01'",
+    'mentoringMetrics': "SELECT * FROM mentoring_rollup WHERE year = 2025 AND season = 'fall'",
+    'gameDetailsExist': "SELECT * FROM gamedetails WHERE gameId = '748590' AND date = '09/13/2025' AND time = '8:00 AM'",
+}
+
+
+def fullScans(cursor: psycopg.Cursor) -> list:
+    """
+    The HOT_QUERIES whose plan reads a whole table, so a missing index
+    shows up before the tables are big enough for anybody to notice.  The
+    tables can be empty, tests/test_dbMigrations.py runs this on a new
+    database.
+    """
+    cockroach = 'cockroachdb' in cursor.execute('SELECT version()').fetchone()[0].lower()
+    scans = []
+    with cursor.connection.transaction():
+        if not cockroach:
+            # PostgreSQL scans a small table whatever indexes it has, unless
+            # it is told to only do that when there is no index to use.
+            # CockroachDB prefers a constrained index scan however small
+            # the table is
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, sql in HOT_QUERIES.items():
+            plan = '\n'.join(row[0] for row in cursor.execute(f'EXPLAIN {sql}').fetchall())
+            # CockroachDB says FULL SCAN, PostgreSQL says Seq Scan
+            if 'FULL SCAN' in plan.upper() or 'SEQ SCAN' in plan.upper():
+                scans.append(name)
+    return scans
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Migrate the database, or check its query plans')
+    parser.add_argument('--check-plans', action='store_true',
+                        help='exit with an error if a hot lookup would scan a whole table')
+    args = parser.parse_args()
+
+    from database import getPool
+    with getPool().connection() as connection:
+        with connection.cursor() as cursor:
+            print(f'Schema version {migrate(cursor)}')
+            if args.check_plans:
+                scans = fullScans(cursor)
+                for name in scans:
+                    print(f'Full table scan: {name}: {HOT_QUERIES[name]}')
+                sys.exit(1 if scans else 0)
@@ -1,30 +1,13 @@
+import sys
 import xlsxwriter
+from io import BytesIO
+from typing import Iterable
 
-""" This is the format of the data coming in:
+from reports import writeReport
 
-Date: 2023-01-07 00:00:00
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: Kareem arrived at 8:45 for his 9:00 game. He was unsure of how to proceed, was not fully aware of how the build out lines worked. And was unaware of rules for heading at this age group. He was dressed professionally but did not have a coin. Kareem managed this U10 game fairly well. He moved well on the field.  He allowed substitutions on corner kicks and twice stopped play while ball was in possession of keeper to allow a substitute. Prior to second game we talked about better proximity to play on field and managing subs.  Both coaches were new and also did not know rules.
+""" The rows coming in are the report queries' (see database.py), sorted by date:
 
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: In Kareems second game he positioned himself better in field to see play and ball near touch lines. We talked at halftime about talking to players on field to clear up confusion about calls. Kareem did note that he felt more confident in second game. NOTE:  in first game, both keepers did not have pennies or jerseys to distinguish them from other players.
-
-Date: 2023-01-14 00:00:00
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: Kareem arrived at 8:45 for his 9:00 game. He was unsure of how to proceed, was not fully aware of how the build out lines worked. And was unaware of rules for heading at this age group. He was dressed professionally but did not have a coin. Kareem managed this U10 game fairly well. He moved well on the field.  He allowed substitutions on corner kicks and twice stopped play while ball was in possession of keeper to allow a substitute. Prior to second game we talked about better proximity to play on field and managing subs.  Both coaches were new and also did not know rules.
-
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: In Kareems second game he positioned himself better in field to see play and ball near touch lines. We talked at halftime about talking to players on field to clear up confusion about calls. Kareem did note that he felt more confident in second game. NOTE:  in first game, both keepers did not have pennies or jerseys to distinguish them from other players.
-
-...and so on
+(firstname, lastname, position, date, comments, mentor_last_name, mentor_first_name)
 
 Spreadsheet is (this does not show the headers)
 ______________________________________________________________________________________________________________
@@ -106,16 +89,8 @@ def writeComments(worksheet: xlsxwriter.worksheet.Worksheet,
     worksheet.write(lineNumber, COMMENTS_COLUMN, line, format)
 
 
-def cleanLine(line: str) -> str:
-    line = line.lstrip()
-    line = line.rstrip()
-    line = line.strip('\t')
-    return line
-
-def getExcelFromText(data: str) -> None:
-
-    workbook = xlsxwriter.Workbook("report.xlsx")
-
+def addFormats(workbook: xlsxwriter.Workbook) -> tuple:
+    """ The header and normal cell formats, and the report worksheet """
 
     # TO DO add wrap and centering if needed for both header and normal
 
@@ -137,67 +112,56 @@ def getExcelFromText(data: str) -> None:
 
     worksheet = workbook.add_worksheet("report")
     worksheet.set_column(COMMENTS_COLUMN, COMMENTS_COLUMN, 88.71, normal_cell)
+    return header_cell, normal_cell, worksheet
 
+
+class ExcelSink(object):
     """
-    1. write a line with date in first cell
-    2. after writing the data, write a line with headers of
-       a. Referee
-       b. Position
-       c. Mentor
-       d. Comment
-    3. write the data for the four above headers on the next line
+    The spreadsheet report as a reports.writeReport sink.  out is a file
+    name or a file object, a date goes on the row of its first session.
     """
 
-    lineNumber = 0
-
-    lines = data.split('\n')
-    for line in lines:
+    def __init__(self, out, options: dict = None):
+        self._workbook = xlsxwriter.Workbook(out, options or {})
+        self._header, self._normal, self._worksheet = addFormats(self._workbook)
+        self._lineNumber = 0
 
-        line = cleanLine(line)
 
-        if line.startswith('Date:'):
-            lineNumber = writeDate(worksheet, header_cell, normal_cell, lineNumber, line.split(':')[1])
+    def date(self, date) -> None:
+        self._lineNumber = writeDate(self._worksheet, self._header, self._normal, self._lineNumber, str(date))
 
-        elif line.startswith('Referee:'):
-            writeReferee(worksheet, normal_cell, lineNumber, line.split(':')[1])
 
-        elif line.startswith("Position:"):
-            writePosition(worksheet, normal_cell, lineNumber, line.split(':')[1])
+    def session(self, entry: dict) -> None:
+        writeReferee(self._worksheet, self._normal, self._lineNumber, entry['ref'])
+        writePosition(self._worksheet, self._normal, self._lineNumber, entry['position'])
+        writeMentor(self._worksheet, self._normal, self._lineNumber, entry['mentor'])
+        writeComments(self._worksheet, self._normal, self._lineNumber, entry['comments'])
+        self._lineNumber += 1
 
-        elif line.startswith('Mentor:'):
-            writeMentor(worksheet, normal_cell, lineNumber, line.split(':')[1])
 
-        elif line.startswith('Comments:'):
-            writeComments(worksheet, normal_cell, lineNumber, line.split(':',1)[1])
-            lineNumber += 1
+    def close(self) -> None:
+        self._workbook.close()
 
-    workbook.close()
 
+def getExcelFromSessions(sessions: Iterable[tuple]) -> bytes:
+    """
+    The spreadsheet for the report rows (sorted by date), built in memory.
+    constant_memory writes each row out as soon as the next one starts,
+    and nothing is written to a file other users' reports could share.
+    """
+    out = BytesIO()
+    writeReport(sessions, ExcelSink(out, { 'constant_memory': True }))
+    return out.getvalue()
 
 
 if __name__ == "__main__":
-    data = """
-    Date: 2023-01-07 00:00:00
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: Kareem arrived at 8:45 for his 9:00 game. He was unsure of how to proceed, was not fully aware of how the build out lines worked. And was unaware of rules for heading at this age group. He was dressed professionally but did not have a coin. Kareem managed this U10 game fairly well. He moved well on the field.  He allowed substitutions on corner kicks and twice stopped play while ball was in possession of keeper to allow a substitute. Prior to second game we talked about better proximity to play on field and managing subs.  Both coaches were new and also did not know rules.
-
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: In Kareems second game he positioned himself better in field to see play and ball near touch lines. We talked at halftime about talking to players on field to clear up confusion about calls. Kareem did note that he felt more confident in second game. NOTE:  in first game, both keepers did not have pennies or jerseys to distinguish them from other players.
-
-    Date: 2023-01-14 00:00:00
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: Kareem arrived at 8:45 for his 9:00 game. He was unsure of how to proceed, was not fully aware of how the build out lines worked. And was unaware of rules for heading at this age group. He was dressed professionally but did not have a coin. Kareem managed this U10 game fairly well. He moved well on the field.  He allowed substitutions on corner kicks and twice stopped play while ball was in possession of keeper to allow a substitute. Prior to second game we talked about better proximity to play on field and managing subs.  Both coaches were new and also did not know rules.
-
-	Referee: Kareem Awad
-	Position: Center
-	Mentor: David Helfgott
-	Comments: In Kareems second game he positioned himself better in field to see play and ball near touch lines. We talked at halftime about talking to players on field to clear up confusion about calls. Kareem did note that he felt more confident in second game. NOTE:  in first game, both keepers did not have pennies or jerseys to distinguish them from other players.
-"""
+    from datetime import datetime
+
+    sessions = [
+        ('kareem', 'awad', 'Center', datetime(2023, 1, 7), 'Kareem arrived at 8:45 for his 9:00 game. He was unsure of how to proceed, was not fully aware of how the build out lines worked.', 'helfgott', 'david'),
+        ('kareem', 'awad', 'Center', datetime(2023, 1, 7), 'In Kareems second game he positioned himself better in field to see play and ball near touch lines.', 'helfgott', 'david'),
+        ('kareem', 'awad', 'Center', datetime(2023, 1, 14), 'NOTE:  in first game, both keepers did not have pennies or jerseys to distinguish them from other players.', 'helfgott', 'david'),
+    ]
 
-    getExcelFromText(data)
+    # the sample report goes to stdout, i.e. python excelWriter.py > sample.xlsx
+    sys.stdout.buffer.write(getExcelFromSessions(sessions))
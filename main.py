@@ -6,6 +6,7 @@ import os
 
 
 from database import RefereeDbCockroach
+from refNames import nameKey
 from refWebSites import MySoccerLeague
 from googleSheets import getRefsFromGoogleSignupSheet
 
@@ -68,9 +69,11 @@ def generateWorkload(currentu: list, newRefs: list, mentored: list, risky: list)
         fieldsOnce = False
         for game in details:
 
-            center = details[game]['Center'].lower()
-            ar1 = details[game]['AR1'].lower()
-            ar2 = details[game]['AR2'].lower()
+            # assignments show names the way MSL has them, compare them the
+            # way the database has them
+            center = nameKey(details[game]['Center'])
+            ar1 = nameKey(details[game]['AR1'])
+            ar2 = nameKey(details[game]['AR2'])
 
             if center not in newRefs and ar1 not in newRefs and ar2 not in newRefs:
                 continue
@@ -133,7 +136,12 @@ def generateWorkload(currentu: list, newRefs: list, mentored: list, risky: list)
     print("")
 
 
-def run() -> None:
+def run(snapshot: dict = None) -> None:
+    """
+    snapshot is what prefetch.py publishes (the app hands it in), its
+    referee roster and this weekend's assignments are used instead of
+    asking MSL for them again.
+    """
 
     # adding this line to try to fix the deployment on streamlit.app
     db = RefereeDbCockroach()
@@ -144,19 +152,21 @@ def run() -> None:
     latestRefsFromSpreadsheet = getRefsFromGoogleSignupSheet()
     # returns list of tuples (lastname, firstname, year_certified)
 
-    for ref in latestRefsFromSpreadsheet:
-        if not db.refExists(ref[0], ref[1]):
-            print(f"{ref[1].capitalize()} {ref[0].capitalize()} not in database, adding")
-            db.addReferee(ref[0], ref[1], ref[2])
+    for ref in db.syncReferees(latestRefsFromSpreadsheet):
+        print(f"{ref[1].capitalize()} {ref[0].capitalize()} not in database, added")
 
     """
-    Retrieve referees from MSL
+    Retrieve referees and this week's current assignments from MSL
     """
-    br = mechanicalsoup.StatefulBrowser(soup_config={ 'features': 'lxml'})
-    br.addheaders = [('User-agent', 'Chrome')]
-
-    allRefsFromMSL = getAllRefereesFromSite(br)
-    # return list of tuples (firstname, lastname)
+    if snapshot is not None:
+        allRefsFromMSL = set(snapshot['referees'])
+        current = snapshot['assignments']
+    else:
+        br = mechanicalsoup.StatefulBrowser(soup_config={ 'features': 'lxml'})
+        br.addheaders = [('User-agent', 'Chrome')]
+        allRefsFromMSL = set(getAllRefereesFromSite(br))
+        current = getRealTimeCurrentRefAssignments(br)
+    # set of tuples (firstname, lastname), names resolved by refNames
 
     # This was a one-time thing?
     # """
@@ -176,9 +186,9 @@ def run() -> None:
          if ref not in allRefsFromMSL:
              print (f'Referee: {ref[0]} {ref[1]} not in MSL, check name spelling')
 
-    # get this week's current assignments
-    current = getRealTimeCurrentRefAssignments(br)
-    db.addGameDetails(current)
+    # store this week's current assignments
+    inserted, skipped = db.addGameDetails(current)
+    print(f'Stored {inserted} games, skipped {skipped} already stored')
 
     # get list of already mentored referees
     mentored = getRefsAlreadyMentored()
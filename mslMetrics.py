@@ -1,3 +1,4 @@
+import argparse
 import os
 import mechanicalsoup
 import time
@@ -6,15 +7,25 @@ from database import RefereeDbCockroach
 from refWebSites import MySoccerLeague
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--window', choices=['week', 'month'], default=None,
+                        help='how much of the season to ask MSL for at a time (default MSL_REPORT_WINDOW or month)')
+    parser.add_argument('--rebuild-rollup', action='store_true',
+                        help='work the mentoring metrics out again from every mentor session first')
+    args = parser.parse_args()
+
     br = mechanicalsoup.StatefulBrowser(soup_config={ 'features': 'lxml'})
     br.addheaders = [('User-agent', 'Chrome')]
     site = MySoccerLeague(br)
-    metrics = site.getReportForSeason('2025-04-01', '2025-12-31')
+    metrics = site.getReportForSeason('2025-04-01', '2025-12-31', args.window)
 
     # metrics
     # {'gamesPlayed': 452, 'totalRefAssignments': 944, 'refsAssigned': 908, 'refsMissing': 36, 'missingCenters': 0, 'missingARs': 36}
 
-    reportMetrics = RefereeDbCockroach().getMentoringSessionMetrics(2025, 'fall')
+    db = RefereeDbCockroach()
+    if args.rebuild_rollup:
+        print(f'Rebuilt the mentoring rollup: {db.rebuildMentoringRollup()} rows')
+    reportMetrics = db.getMentoringSessionMetrics(2025, 'fall')
 
     # reportMetrics
     # {'mentors': 5, 'referees': 31, 'reports': 52}
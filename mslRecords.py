@@ -0,0 +1,177 @@
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, List
+
+"""
+Compact records for the matches and assignments scraped from MSL.
+
+A season is thousands of games, and as dicts every one of them carried its
+own copy of the keys and of the referee, venue and time strings.  These
+records keep their fields in __slots__ and intern the strings that repeat,
+while still answering game['Center'] the way the dicts did, so ui.py,
+main.py and database.py don't need to change.
+
+SeasonMatches goes further for the whole season: the fields are stored a
+column at a time as indexes into one table of strings.
+"""
+
+
+class _Record(object):
+    """ Read only dict access to the slots, through the keys in _keys """
+
+    __slots__ = ()
+
+    # dict key -> slot
+    _keys = {}
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            # the same few names, venues and times repeat all season
+            setattr(self, name, sys.intern(value) if isinstance(value, str) else value)
+
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, self._keys[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+
+    def get(self, key: str, default=None):
+        return getattr(self, self._keys[key]) if key in self._keys else default
+
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+
+    def __iter__(self):
+        return iter(self._keys)
+
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+    def keys(self):
+        return self._keys.keys()
+
+
+    def values(self) -> list:
+        return [getattr(self, name) for name in self._keys.values()]
+
+
+    def items(self) -> list:
+        return [(key, getattr(self, name)) for key, name in self._keys.items()]
+
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _Record):
+            other = dict(other.items())
+        return dict(self.items()) == other
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(self.items())})'
+
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+class Match(_Record):
+    """ A game from getMatches """
+
+    __slots__ = ('center', 'ar1', 'ar2', 'time', 'level', 'age', 'gameId')
+    _keys = {
+        'Center': 'center',
+        'AR1': 'ar1',
+        'AR2': 'ar2',
+        'Time': 'time',
+        'Level': 'level',
+        'Age': 'age',
+        'GameID': 'gameId'
+    }
+
+
+class Assignment(_Record):
+    """ A game from getAssignments """
+
+    __slots__ = ('center', 'ar1', 'ar2', 'date', 'gameTime', 'age', 'level')
+    _keys = {
+        'Center': 'center',
+        'AR1': 'ar1',
+        'AR2': 'ar2',
+        'date': 'date',
+        'gameTime': 'gameTime',
+        'age': 'age',
+        'level': 'level'
+    }
+
+
+class SeasonMatches(Mapping):
+    """
+    getMatches for every date of a season, stored by column.  It reads like
+    the dict it replaces: season[date] is {venue: [Match, ...]} and the
+    dates come back in the order they were added.
+    """
+
+    def __init__(self, matchesByDate: Dict[str, Dict[str, List[Match]]] = None):
+        self._strings = []
+        self._codes = {}
+        self._columns = [array('I') for _ in Match.__slots__]
+        # date -> [(venue code, first row, end row), ...]
+        self._dates = {}
+        for date, venues in (matchesByDate or {}).items():
+            self._add(date, venues)
+
+
+    def _code(self, s: str) -> int:
+        code = self._codes.get(s)
+        if code is None:
+            code = self._codes[s] = len(self._strings)
+            self._strings.append(s)
+        return code
+
+
+    def _add(self, date: str, venues: Dict[str, List[Match]]) -> None:
+        spans = []
+        for venue, games in venues.items():
+            first = len(self._columns[0])
+            for game in games:
+                for column, name in zip(self._columns, Match.__slots__):
+                    column.append(self._code(getattr(game, name)))
+            spans.append((self._code(venue), first, len(self._columns[0])))
+        self._dates[sys.intern(date)] = spans
+
+
+    def __getitem__(self, date: str) -> Dict[str, List[Match]]:
+        strings = self._strings
+        columns = self._columns
+        venues = {}
+        for venue, first, end in self._dates[date]:
+            venues[strings[venue]] = [Match(*[strings[column[row]] for column in columns])
+                                      for row in range(first, end)]
+        return venues
+
+
+    def __iter__(self):
+        return iter(self._dates)
+
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+
+    def __getstate__(self):
+        return (self._strings, self._columns, self._dates)
+
+
+    def __setstate__(self, state):
+        self._strings, self._columns, self._dates = state
+        self._codes = { s: code for code, s in enumerate(self._strings) }
@@ -0,0 +1,76 @@
+import re
+import threading
+from typing import Callable, Optional, Tuple
+
+import requests
+
+
+# the login form is what MSL hands back instead of the page we asked for
+# once the YSLkey has expired
+_loginFormPattern = re.compile(r'name=["\']?userName', re.IGNORECASE)
+
+
+class MslSession(object):
+    """
+    Login state (YSLkey and cookies) for mysoccerleague.com, shared by all
+    the MySoccerLeague instances in the process so we only log in when the
+    site tells us the session is gone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loginKey = None
+        self._cookies = None
+        self.logins = 0
+
+
+    @staticmethod
+    def isExpired(page: str) -> bool:
+        return _loginFormPattern.search(page) is not None
+
+
+    def getKey(self, browser, login: Callable) -> str:
+        """
+        Return the current session key, logging in with browser first if
+        there is none.  The session cookies are copied into browser.
+        """
+        with self._lock:
+            if self._loginKey is None:
+                # failures go back to the caller, whose retry policy decides
+                # whether to try again
+                self._loginKey = login(browser)
+                self._cookies = requests.cookies.RequestsCookieJar()
+                self._cookies.update(browser.session.cookies)
+                self.logins += 1
+            key = self._loginKey
+            cookies = self._cookies
+
+        if cookies is not None:
+            browser.session.cookies.update(cookies)
+        return key
+
+
+    def current(self) -> Tuple[Optional[str], dict]:
+        """ The key and cookies (name -> value) of the login we have, key is None if there is none """
+        with self._lock:
+            cookies = requests.utils.dict_from_cookiejar(self._cookies) if self._cookies is not None else {}
+            return self._loginKey, cookies
+
+
+    def store(self, key: str, cookies: dict) -> None:
+        """ Share a login done without a browser, i.e. by the aiohttp engine """
+        with self._lock:
+            self._loginKey = key
+            self._cookies = requests.cookies.cookiejar_from_dict(cookies)
+            self.logins += 1
+
+
+    def invalidate(self, key: str) -> None:
+        # only drop the key if nobody has logged in again in the meantime
+        with self._lock:
+            if self._loginKey == key:
+                self._loginKey = None
+                self._cookies = None
+
+
+mslSession = MslSession()
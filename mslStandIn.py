@@ -0,0 +1,147 @@
+import argparse
+import datetime
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+"""
+A local stand in for mysoccerleague.com.  It serves the pages in
+fixtures/msl so the scraper can be run (and timed) without network access
+or MSL credentials.  Point the scraper at it with:
+
+    MSL_BASE_URL=http://127.0.0.1:8765 python main.py
+
+The fixtures have the same layout as the real pages; the rows between the
+<!-- rows --> markers can be repeated to get season sized pages.
+"""
+
+fixtureDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'msl')
+
+LOGIN_KEY = 'standin'
+
+
+def _seasonDates(year: int) -> list:
+    # every Friday, Saturday and Sunday from the end of August through November
+    d = datetime.date(year, 8, 22)
+    end = datetime.date(year, 11, 30)
+    dates = []
+    while d <= end:
+        if d.weekday() in (4, 5, 6):
+            dates.append(f'{d.strftime("%A, %B")} {d.day}, {d.year}')
+        d += datetime.timedelta(1)
+    return dates
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    # set by startStandIn/serve
+    latency = 0.0
+    repeat = 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def _fixture(self, name: str, **values) -> str:
+        with open(os.path.join(fixtureDir, name), 'r', encoding='utf-8') as fp:
+            page = fp.read()
+
+        if self.repeat > 1 and '<!-- rows -->' in page:
+            head, rest = page.split('<!-- rows -->', 1)
+            rows, tail = rest.split('<!-- /rows -->', 1)
+            page = head + rows * self.repeat + tail
+
+        values['loginKey'] = LOGIN_KEY
+        for k, v in values.items():
+            page = page.replace('{' + k + '}', v)
+        return page
+
+
+    def _send(self, page: str) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        body = page.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == '/YSLmobile.jsp':
+            return self._send(self._fixture('login.html'))
+
+        # like the real site, a missing or stale key gets you the login page
+        if query.get('YSLkey', [None])[0] != LOGIN_KEY:
+            return self._send(self._fixture('login.html'))
+
+        if url.path == '/ViewRefAssignments.jsp':
+            if 'date' not in query:
+                links = [f'<a href="#">{d}</a>' for d in _seasonDates(datetime.date.today().year)]
+                return self._send(self._fixture('dates.html', dates='\n'.join(links)))
+            return self._send(self._fixture('assignments.html', date=query['date'][0]))
+
+        if url.path == '/AddRef.jsp':
+            return self._send(self._fixture('referees.html'))
+
+        if url.path == '/GamesReportChoice.jsp':
+            return self._send(self._fixture('reportChoice.html'))
+
+        self.send_error(404)
+
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+
+        if url.path == '/YSLmobile.jsp':
+            return self._send(self._fixture('home.html'))
+
+        if url.path == '/ShowGameReports.jsp':
+            if form.get('YSLkey', [None])[0] != LOGIN_KEY:
+                return self._send(self._fixture('login.html'))
+            return self._send(self._fixture('gameReports.html',
+                                            date=form.get('startDate', [''])[0]))
+
+        self.send_error(404)
+
+
+def _makeServer(port: int, latency: float, repeat: int) -> ThreadingHTTPServer:
+    handler = type('ConfiguredStandInHandler', (StandInHandler,),
+                   { 'latency': latency, 'repeat': repeat })
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def startStandIn(port: int = 0, latency: float = 0.0, repeat: int = 1) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Run the stand in on a background thread, port 0 picks a free port.
+    Returns the server (call shutdown() on it when done) and its base url.
+    """
+    server = _makeServer(port, latency, repeat)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local stand in for mysoccerleague.com')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=float(os.environ.get('MSL_STANDIN_LATENCY', '0')),
+                        help='seconds to wait before answering each request')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='repeat the table rows of each page this many times')
+    args = parser.parse_args()
+
+    server = _makeServer(args.port, args.latency, args.repeat)
+    print(f'MSL stand in on http://127.0.0.1:{args.port} (export MSL_BASE_URL to use it)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,88 @@
+from io import BytesIO
+from typing import Iterator, NamedTuple, Tuple
+
+from lxml import etree
+
+"""
+MSL pages put their data in table rows with class trstyle1 or trstyle2
+(alternating row colors).  Rather than building a full BeautifulSoup tree
+and searching it once per row class, the page is parsed once, as a stream,
+and the rows come out in the order they are on the page.
+"""
+
+ROW_CLASSES = ('trstyle1', 'trstyle2')
+
+
+class MatchRow(NamedTuple):
+    """ A row of ViewRefAssignments.jsp """
+    gameId: str
+    venue: str
+    gameTime: str
+    level: str
+    age: str
+    gender: str
+    league: str
+    home: str
+    away: str
+    center: str
+    ar1: str
+    ar2: str
+
+
+class RefereeRow(NamedTuple):
+    """ The columns we use from a row of AddRef.jsp """
+    fullName: str
+    email: str
+
+
+class ReportRow(NamedTuple):
+    """ A row of ShowGameReports.jsp """
+    dateTime: str
+    gameId: str
+    venue: str
+    age: str
+    gender: str
+    league: str
+    home: str
+    away: str
+    center: str
+    ar1: str
+    ar2: str
+
+
+def iterRows(page: str, classes: Tuple[str, ...] = ROW_CLASSES) -> Iterator[Tuple[str, ...]]:
+    """
+    Yield the text of the cells for every row with one of classes among
+    its classes, like BeautifulSoup's find_all(class_=...).
+    """
+    wanted = frozenset(classes)
+    rows = etree.iterparse(BytesIO(page.encode('utf-8')),
+                           events=('end',),
+                           tag='tr',
+                           html=True,
+                           encoding='utf-8',
+                           remove_comments=True)
+    for _, row in rows:
+        if not wanted.isdisjoint((row.get('class') or '').split()):
+            yield tuple(''.join(cell.itertext()) for cell in row.iter('td'))
+
+        # we are done with this row, don't let the tree grow with the page
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+
+def iterMatchRows(page: str) -> Iterator[MatchRow]:
+    for cells in iterRows(page):
+        yield MatchRow._make(cells[:12])
+
+
+def iterRefereeRows(page: str) -> Iterator[RefereeRow]:
+    for cells in iterRows(page):
+        yield RefereeRow(cells[4], cells[7])
+
+
+def iterReportRows(page: str) -> Iterator[ReportRow]:
+    # only the trstyle2 rows of the game report are games
+    for cells in iterRows(page, ('trstyle2',)):
+        yield ReportRow._make(cells[:11])
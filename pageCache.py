@@ -0,0 +1,73 @@
+import datetime
+import hashlib
+import os
+import time
+import uuid
+from typing import Optional
+
+
+class PageCache(object):
+    """
+    On disk cache of the pages pulled from a referee web site.
+
+    Pages are keyed by url and the date they are for.  Pages for dates that
+    are already in the past do not change anymore so they are kept forever,
+    pages for today, the future or without a date expire after ttl seconds.
+    """
+
+    def __init__(self, directory: str = None, ttl: int = None):
+        if directory is None:
+            directory = os.environ.get('MSL_CACHE_DIR', '.mslcache')
+        if ttl is None:
+            ttl = int(os.environ.get('MSL_CACHE_TTL', '3600'))
+        self._directory = directory
+        self._ttl = ttl
+        self.forceRefresh = os.environ.get('MSL_CACHE_REFRESH', 'false').lower() == 'true'
+        os.makedirs(self._directory, exist_ok=True)
+
+
+    def _path(self, url: str, date: Optional[datetime.date]) -> str:
+        prefix = date.strftime('%Y-%m-%d') if date is not None else 'nodate'
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, f'{prefix}-{digest}.html')
+
+
+    def _isFresh(self, path: str, date: Optional[datetime.date]) -> bool:
+        if date is not None and date < datetime.date.today():
+            return True
+        return time.time() - os.path.getmtime(path) < self._ttl
+
+
+    def get(self, url: str, date: Optional[datetime.date] = None) -> Optional[str]:
+        if self.forceRefresh:
+            return None
+        path = self._path(url, date)
+        try:
+            if not self._isFresh(path, date):
+                return None
+            with open(path, 'r', encoding='utf-8') as fp:
+                return fp.read()
+        except OSError:
+            return None
+
+
+    def put(self, url: str, date: Optional[datetime.date], page: str) -> None:
+        path = self._path(url, date)
+        # write to a private file first so concurrent readers never see
+        # a partially written page
+        tmpPath = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmpPath, 'w', encoding='utf-8') as fp:
+            fp.write(page)
+        os.replace(tmpPath, path)
+
+
+    def clear(self) -> None:
+        for name in os.listdir(self._directory):
+            # the pages, and the private files of any put() that was
+            # interrupted before its rename
+            if name.endswith('.html') or (name.endswith('.tmp') and '.html.' in name):
+                try:
+                    os.remove(os.path.join(self._directory, name))
+                except FileNotFoundError:
+                    # a put() finished (or another clear() got there) first
+                    pass
@@ -0,0 +1,169 @@
+import argparse
+import mechanicalsoup
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as dtdate, datetime, timedelta
+from functools import partial
+
+from dataStore import DataStore
+from mslRecords import SeasonMatches
+from refWebSites import MySoccerLeague, scrapeWorkers
+
+"""
+Keeps the MSL data the app shows warm.  It scrapes on a schedule and
+publishes a snapshot to the DataStore, the app only ever reads the latest
+snapshot.  However many app processes there are, only one of them (the
+one holding the 'prefetch' lease in the store) scrapes.  It runs on a
+thread inside the app (MSL_PREFETCH=thread, the default) or on its own:
+
+    python prefetch.py
+
+with MSL_PREFETCH=process set for the app.
+"""
+
+# 'async' scrapes with the aiohttp engine (asyncRefWebSites) instead of a
+# pool of mechanicalsoup browsers
+scrapeEngine = os.environ.get('MSL_ENGINE', 'threads')
+
+# seconds between scrapes, 0 scrapes once
+refreshInterval = int(os.environ.get('MSL_REFRESH_SECONDS', '600'))
+
+# seconds before trying again after a failed scrape, doubling with every
+# failure in a row up to refreshInterval
+retryInterval = int(os.environ.get('MSL_PREFETCH_RETRY_SECONDS', '15'))
+
+_workerState = threading.local()
+_prefetchLock = threading.Lock()
+_startLock = threading.Lock()
+_prefetcher = None
+
+
+def _newSite() -> MySoccerLeague:
+    br = mechanicalsoup.StatefulBrowser(soup_config={ 'features': 'lxml'})
+    br.addheaders = [('User-agent', 'Chrome')]
+    return MySoccerLeague(br)
+
+
+def _getMatchesForDate(date: str, refresh: bool = False) -> dict:
+    # a StatefulBrowser is not safe to share between threads, so every worker
+    # thread gets (and keeps) its own site
+    site = getattr(_workerState, 'site', None)
+    if site is None:
+        site = _workerState.site = _newSite()
+    return site.getMatches(date, refresh)
+
+
+def _fetchMatches(dates: list, workers: int, refresh: bool = False) -> dict:
+    if workers is None:
+        workers = scrapeWorkers
+    workers = max(1, min(workers, len(dates)))
+
+    if scrapeEngine == 'async':
+        from asyncRefWebSites import BlockingMySoccerLeague
+        site = BlockingMySoccerLeague(workers)
+        try:
+            return site.getSeasonMatches(dates, refresh)
+        finally:
+            site.close()
+
+    # map() hands the results back in the same order as dates, so the
+    # dict is built in season order just like the sequential version
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        matches = list(pool.map(partial(_getMatchesForDate, refresh=refresh), dates))
+
+    return dict(zip(dates, matches))
+
+
+def _isFinished(date: str) -> bool:
+    # dates look like "Saturday, September 24, 2022"
+    return datetime.strptime(date, "%A, %B %d, %Y").date() < dtdate.today()
+
+
+def buildSnapshot(previous: dict = None, workers: int = None) -> dict:
+    """
+    Scrape everything the app shows.  Matches for finished dates are taken
+    from previous when it has them, only today, the future and dates we
+    have not seen yet are fetched again.
+    """
+    site = _newSite()
+    dates = site.getAllDatesForSeason(refresh=True)
+
+    if previous is None:
+        # nothing to go on, let the page cache answer for what it can
+        matches = SeasonMatches(_fetchMatches(dates, workers))
+    else:
+        current = previous['matches']
+        stale = [d for d in dates if d not in current or not _isFinished(d)]
+        fetched = _fetchMatches(stale, workers, refresh=True)
+        matches = SeasonMatches({d: fetched[d] if d in fetched else current[d] for d in dates})
+
+    referees = site.getAllReferees()
+
+    # this weekend, the same way main.py asks for it
+    site.setSpecificDate(datetime.now() - timedelta(days=1))
+    assignments = site.getAssignments()
+
+    return {
+        'published': datetime.now(),
+        'dates': dates,
+        'matches': matches,
+        'referees': referees,
+        'emails': site.emails,
+        'assignments': assignments
+    }
+
+
+def prefetchOnce(store: DataStore, workers: int = None) -> dict:
+    with _prefetchLock:
+        snapshot = buildSnapshot(store.load(), workers)
+        store.publish(snapshot)
+    return snapshot
+
+
+def prefetchForever(store: DataStore, interval: int = None, workers: int = None) -> None:
+    if interval is None:
+        interval = refreshInterval
+    # every app process on the host runs this, the one holding the lease
+    # scrapes and the others just read what it publishes.  The lease
+    # outlives a couple of missed rounds before another process takes over.
+    leaseSeconds = max(interval * 3, 60)
+    failures = 0
+    while True:
+        wait = interval
+        try:
+            if store.acquireLease('prefetch', leaseSeconds):
+                prefetchOnce(store, workers)
+            failures = 0
+        except Exception as ex:
+            # keep serving the last snapshot, and try again soon rather than
+            # leaving a new deploy without one for a whole interval
+            print(f'Prefetching MSL data failed: {ex}')
+            wait = min(interval, retryInterval * 2 ** failures)
+            failures += 1
+        if interval <= 0:
+            return
+        time.sleep(wait)
+
+
+def startPrefetcher(store: DataStore, interval: int = None, workers: int = None) -> None:
+    """ Run prefetchForever on a background thread, once per process """
+    global _prefetcher
+
+    with _startLock:
+        if _prefetcher is not None:
+            return
+        _prefetcher = threading.Thread(target=prefetchForever, args=(store, interval, workers), daemon=True)
+        _prefetcher.start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Keep the MSL data snapshot for the app up to date')
+    parser.add_argument('--interval', type=int, default=refreshInterval,
+                        help='seconds between scrapes, 0 scrapes once and exits')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='pages to fetch at once (default MSL_SCRAPE_WORKERS)')
+    args = parser.parse_args()
+
+    prefetchForever(DataStore(), args.interval, args.workers)
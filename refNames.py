@@ -0,0 +1,121 @@
+from typing import Optional, Tuple
+
+"""
+Turns a referee name the way MSL shows it into (first name, last name).
+
+MSL names are typed in by hand so they come in all shapes: extra spaces,
+suffixes ("Michael Aguilera Jr.", "William Covey, Jr"), "Last, First",
+particles ("Alexandre de Souza"), middle names and two word first or last
+names.  The general rules below handle most of them, NAME_OVERRIDES says
+how to split the three part names of the people they can't.  A three part
+name nothing covers is split as first + last and reported, add the person
+to NAME_OVERRIDES if that's wrong.
+"""
+
+# how NAME_OVERRIDES splits a three part name
+DROP_MIDDLE = 'drop middle'      # Russell X Bower -> Russell, Bower
+FIRST_TWO = 'first two'          # Mary Kate X -> Mary Kate, X
+LAST_TWO = 'last two'            # James X Horn -> James, X Horn
+
+# the people with three part names, keyed on the lower case first word and
+# either the last word or (when that's all we know) the middle one
+NAME_OVERRIDES = {
+    ('russell', 'bower'): DROP_MIDDLE,
+    ('sophie', 'hinton'): DROP_MIDDLE,
+    ('vivienne', 'huang'): DROP_MIDDLE,
+    ('andrew', 'teale'): DROP_MIDDLE,
+    ('gabi', 'konde'): DROP_MIDDLE,
+    ('tyler', 'pechenik'): DROP_MIDDLE,
+    ('mary', 'kate'): FIRST_TWO,
+    ('james', 'horn'): LAST_TWO,
+    ('joseph', 'sandoval'): LAST_TWO,
+    ('joseph', 'howe'): LAST_TWO,
+    ('jack', 'raaphorst'): LAST_TWO,
+    ('laith', 'habri'): LAST_TWO,
+    ('rayan', 'hababi'): LAST_TWO,
+    ('mohamed', 'nour'): LAST_TWO,
+    ('sofia', 'velasquez'): LAST_TWO,
+    ('martiel', 'ruiz'): LAST_TWO,
+    ('gabriella', '(brie)'): LAST_TWO,
+}
+
+SUFFIXES = frozenset(['jr', 'jr.', 'sr', 'sr.', 'ii', 'iii', 'iv'])
+
+# a last name starts at one of these ("de Souza", "van der Berg")
+PARTICLES = frozenset(['de', 'da', 'del', 'della', 'di', 'du', 'la', 'le', 'van', 'von', 'der', 'den', 'st.'])
+
+# what MSL shows when there is nobody to name
+NOT_A_NAME = frozenset(['(requested)', ''])
+
+
+_reported = set()
+
+
+def _reportGuess(name: str, first: str, last: str) -> None:
+    # once per name, ui.py resolves the same names on every rerun
+    if name not in _reported:
+        _reported.add(name)
+        print(f'Guessing at the name {name}: first {first}, last {last}. Add it to NAME_OVERRIDES if that is wrong')
+
+
+def splitName(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return (first, last) with the case as MSL has it, or (None, None) when
+    name isn't a person.  A single word comes back as (word, '').
+    """
+    name = ' '.join(name.split())
+    key = name.lower()
+    if key in NOT_A_NAME:
+        return None, None
+    first, sep, rest = name.partition(',')
+    if sep:
+        rest = rest.strip()
+        if rest.lower() in SUFFIXES:
+            # "William Covey, Jr"
+            name = f'{first.strip()} {rest}'
+        else:
+            # "Aguilera, Michael Jr."
+            given = rest.split(' ')
+            return given[0], first.strip()
+
+    parts = name.split(' ')
+    if len(parts) == 1:
+        return parts[0], ''
+
+    suffix = None
+    if len(parts) > 2 and parts[-1].lower() in SUFFIXES:
+        suffix = parts.pop()
+
+    lowered = [p.lower() for p in parts]
+    override = None
+    if len(parts) == 3:
+        override = NAME_OVERRIDES.get((lowered[0], lowered[2]), NAME_OVERRIDES.get((lowered[0], lowered[1])))
+
+    if override == DROP_MIDDLE:
+        first, last = parts[0], parts[2]
+    elif override == FIRST_TWO:
+        first, last = f'{parts[0]} {parts[1]}', parts[2]
+    else:
+        first = parts[0]
+        start = None
+        for i in range(1, len(parts) - 1):
+            if lowered[i] in PARTICLES:
+                # anything between the first name and the particle is a
+                # middle name
+                start = i
+                break
+        last = ' '.join(parts[start or 1:])
+        if override is None and suffix is None and start is None and len(parts) > 2:
+            _reportGuess(name, first, last)
+
+    if suffix is not None:
+        last = f'{last} {suffix}'
+    return first, last
+
+
+def nameKey(name: str) -> str:
+    """ 'first last' in lower case, the way names are compared to the database """
+    first, last = splitName(name)
+    if first is None:
+        return name.lower()
+    return f'{first} {last}'.lower().strip()
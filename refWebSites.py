@@ -1,14 +1,59 @@
 import os
 import datetime
-import time
+import mechanicalsoup
+import re
+import threading
+from abc import ABC, abstractmethod
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 
-class RefereeWebSite(object):
+from mslRecords import Assignment, Match
+from mslSession import MslSession, mslSession
+from mslTables import iterMatchRows, iterRefereeRows, iterReportRows
+from pageCache import PageCache
+from refNames import splitName
+from retryPolicy import RetryPolicy, mslRetry
 
-    def __init__(self, br):
+# how many pages to fetch at once when a call needs more than one
+scrapeWorkers = int(os.environ.get('MSL_SCRAPE_WORKERS', '4'))
+
+# seconds to wait for MSL to answer before giving up on a request
+requestTimeout = float(os.environ.get('MSL_TIMEOUT', '30'))
+
+# how getReportForSeason splits the season into report requests, 'week' or 'month'
+reportWindow = os.environ.get('MSL_REPORT_WINDOW', 'month')
+
+
+SEASON_DATES_URL = "https://mysoccerleague.com/ViewRefAssignments.jsp?seasonId=0&leagueId=91&dateMode=allDates"
+REFEREES_URL = 'https://www.mysoccerleague.com/AddRef.jsp?actionName=Referees&showAll=true'
+REPORT_CHOICE_URL = 'https://mysoccerleague.com/GamesReportChoice.jsp?actionName=Game%20Reports'
+
+
+def onSite(url: str, siteBase: Optional[str]) -> str:
+    # swap mysoccerleague.com for siteBase (MSL_BASE_URL) when there is one
+    if siteBase is None:
+        return url
+    return re.sub(r'^https://(www\.)?mysoccerleague\.com', siteBase.rstrip('/'), url)
+
+
+def _checkResponse(response):
+    # server errors and throttling are worth retrying, raise so the retry
+    # policy sees them
+    if response.status_code >= 500 or response.status_code == 429:
+        response.raise_for_status()
+    return response
+
+
+class RefereeWebSite(ABC):
+
+    def __init__(self, br, cache: PageCache = None, retry: RetryPolicy = None):
         self._browser = br
         self._baseUrl = None
         self._loginPage = None
         self._loginFormInput = None
+        self._cache = cache if cache is not None else PageCache()
+        self._retry = retry if retry is not None else mslRetry
 
     def baseUrl(self):
         return self._baseUrl
@@ -22,51 +67,155 @@ class RefereeWebSite(object):
     def getLocationDetails(self, assignmentData):
         return None
 
+    def setForceRefresh(self, refresh: bool) -> None:
+        # skip the page cache (but still update it) for every page fetched
+        self._cache.forceRefresh = refresh
+
+    def _siteUrl(self, url: str) -> str:
+        return url
+
+    def _isLoginPage(self, page: str) -> bool:
+        return False
+
+    @abstractmethod
+    def _download(self, url: str):
+        """ Get url from the site itself, _fetch does the caching and retrying """
+
+    def _fetch(self,
+               url: str,
+               date: Optional[datetime.date] = None,
+               refresh: bool = False,
+               download: Callable = None) -> str:
+        """
+        Return the page for url, from the page cache when we have a fresh
+        copy, otherwise from the site.  date is the day the page is about
+        and decides how long the page can be cached.
+        """
+        url = self._siteUrl(url)
+        if not refresh:
+            page = self._cache.get(url, date)
+            if page is not None:
+                return page
+
+        if download is None:
+            download = self._download
+        response = self._retry.call(download, url)
+        # never cache the login form MSL sends back when the session has gone,
+        # a past date's entry would serve it forever
+        if response.ok and not self._isLoginPage(response.text):
+            self._cache.put(url, date, response.text)
+        return response.text
+
 
 class MySoccerLeague(RefereeWebSite):
 
-    def __init__(self, br):
-        super(MySoccerLeague, self).__init__(br)
+    def __init__(self,
+                 br,
+                 cache: PageCache = None,
+                 session: MslSession = None,
+                 retry: RetryPolicy = None):
+        super(MySoccerLeague, self).__init__(br, cache, retry)
         self._baseUrl = self._loginPage = "https://mysoccerleague.com/YSLmobile.jsp"
         self._loginFormInput = { 'userName': os.environ['mslUsername'],
                                 'password': os.environ['mslPassword'] }
 
-        for _ in range(3):
-            try:
-                self._login()
-            except Exception as ex:
-                time.sleep(3)
-            else:
-                break
+        # MSL_BASE_URL points us at another copy of the site, i.e. the
+        # local stand in from mslStandIn.py
+        self._siteBase = os.environ.get('MSL_BASE_URL')
+
+        # the login is shared by every instance and only happens once a page
+        # is not in the cache
+        self._session = session if session is not None else mslSession
+        self._loginKey = None
         self._getFutureDates(datetime.date.today())
         self.emails = []
 
 
-    def _login(self):
+    def _login(self, br) -> str:
         # The site we will navigate into, handling it's session
-        self._browser.open(self._baseUrl)
-        #print(self._browser.get_current_page())
+        _checkResponse(br.open(self._siteUrl(self._baseUrl), timeout=requestTimeout))
+        #print(br.get_current_page())
 
         #login_page.raise_for_status()
-        self._browser.select_form('form')
-        #self._browser.get_current_form().print_summary()
-        self._browser['userName'] = self._loginFormInput['userName']
-        self._browser['password'] = self._loginFormInput['password']
-        self._loginResponse = self._browser.submit_selected()
-        self._loginKey = self._loginResponse.soup.find_all('a')[13]['href'].split('?')[1].split('&')[0].split('=')[1]
+        br.select_form('form')
+        #br.get_current_form().print_summary()
+        br['userName'] = self._loginFormInput['userName']
+        br['password'] = self._loginFormInput['password']
+        self._loginResponse = _checkResponse(br.submit_selected(timeout=requestTimeout))
+        return self._loginKeyFromPage(self._loginResponse.soup)
+
+
+    @staticmethod
+    def _loginKeyFromPage(soup) -> str:
+        return soup.find_all('a')[13]['href'].split('?')[1].split('&')[0].split('=')[1]
+
+
+    def _siteUrl(self, url: str) -> str:
+        return onSite(url, self._siteBase)
+
+
+    def _isLoginPage(self, page: str) -> bool:
+        return self._session.isExpired(page)
+
+
+    def _download(self, url: str):
+        # cached urls leave out the session key, it changes with every login
+        for _ in range(2):
+            self._loginKey = self._session.getKey(self._browser, self._login)
+            response = _checkResponse(self._browser.open(url.replace('?', f'?YSLkey={self._loginKey}&', 1),
+                                                         timeout=requestTimeout))
+            if not self._session.isExpired(response.text):
+                break
+            # MSL sent us back to the login form, log in again and retry once
+            self._session.invalidate(self._loginKey)
+        return response
+
+
+    def _newWorkerSite(self):
+        br = mechanicalsoup.StatefulBrowser(soup_config={ 'features': 'lxml'})
+        br.addheaders = [('User-agent', 'Chrome')]
+        site = MySoccerLeague(br, self._cache, self._session, self._retry)
+        site._siteBase = self._siteBase
+        return site
+
+
+    def _concurrently(self, work: Callable, items: list) -> list:
+        """
+        Run work(site, item) for every item on a pool of threads and return
+        the results in the order of items.  A StatefulBrowser can't be shared
+        between threads so each thread gets its own site, they all share our
+        login and page cache.
+        """
+        workerState = threading.local()
+
+        def run(item):
+            site = getattr(workerState, 'site', None)
+            if site is None:
+                site = workerState.site = self._newWorkerSite()
+            return work(site, item)
+
+        workers = max(1, min(scrapeWorkers, len(items)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run, items))
 
 
     def _getFutureDates(self, d: datetime.date):
         """
         Get the dates for the url for Friday, Saturday, and Sunday.
         """
+        # main.py hands us a datetime, the page cache compares dates
+        if isinstance(d, datetime.datetime):
+            d = d.date()
         while d.weekday() != 4:  # Friday
             d += datetime.timedelta(1)
 
+        self._fridayDate = d
         self._friday = d.strftime('%m/%d/%Y')
         d += datetime.timedelta(1)
+        self._saturdayDate = d
         self._saturday = d.strftime('%m/%d/%Y')
         d += datetime.timedelta(1)
+        self._sundayDate = d
         self._sunday = d.strftime('%m/%d/%Y')
 
 
@@ -75,17 +224,17 @@ class MySoccerLeague(RefereeWebSite):
         self._getFutureDates(d)
 
 
-    def _parseAssignments(self, assignments: list, results: dict, date: str) -> None:
-        for a in assignments:
-            elements = a.find_all('td')
-            ref1 = elements[9].text
-            ref2 = elements[10].text
-            ref3 = elements[11].text
-            field = elements[1].text
-            level = elements[3].text
-            gameTime = elements[2].text
-            age = elements[4].text
-            gameId = elements[0].text
+    @staticmethod
+    def _parseAssignments(page: str, results: dict, date: str) -> None:
+        for row in iterMatchRows(page):
+            ref1 = row.center
+            ref2 = row.ar1
+            ref3 = row.ar2
+            field = row.venue
+            level = row.level
+            gameTime = row.gameTime
+            age = row.age
+            gameId = row.gameId
 
             if ref1 in (' ', '\xa0', 'Not Used\n'):
                 ref1 = 'None'
@@ -95,15 +244,7 @@ class MySoccerLeague(RefereeWebSite):
                 ref3 = 'None'
             if field not in results:
                 results[field] = {}
-            results[field][gameId] = {
-                'Center': ref1,
-                'AR1': ref2,
-                'AR2': ref3,
-                'date': date,
-                'gameTime': gameTime,
-                'age': age,
-                'level': level
-            }
+            results[field][gameId] = Assignment(ref1, ref2, ref3, date, gameTime, age, level)
             # if ref1 not in (' ', '\xa0', 'Not Used\n'):
             #     if ref1 not in results:
             #         results[ref1] = {}
@@ -118,11 +259,14 @@ class MySoccerLeague(RefereeWebSite):
             #     results[ref3][gameId] = { 'field': field, 'date': date, 'gameTime': gameTime, 'age': age, 'position': 'AR2' }
 
 
-    def getAllDatesForSeason(self) -> list:
-        url = "https://mysoccerleague.com/ViewRefAssignments.jsp?YSLkey={0}&seasonId=0&leagueId=91&dateMode=allDates".format(self._loginKey)
+    def getAllDatesForSeason(self, refresh: bool = False) -> list:
+        return self._datesFromPage(self._fetch(SEASON_DATES_URL, refresh=refresh))
 
-        page = self._browser.open(url)
-        box = page.soup.find("td", { "class" : 'tblborderforms', 'align' : 'center' })
+
+    @staticmethod
+    def _datesFromPage(page: str) -> list:
+        soup = BeautifulSoup(page, 'lxml')
+        box = soup.find("td", { "class" : 'tblborderforms', 'align' : 'center' })
         dates = box.find_all("a")
         results = []
         # skip the first two entries
@@ -131,8 +275,14 @@ class MySoccerLeague(RefereeWebSite):
         return results
 
 
-    def getMatches(self, dateInfo: str) -> dict:
-        url = 'https://www.mysoccerleague.com/ViewRefAssignments.jsp?YSLkey={0}&seasonId=0&leagueId=91&dateMode=allDates&date={1}'
+    def getMatches(self, dateInfo: str, refresh: bool = False) -> dict:
+        url, date = self._matchesUrl(dateInfo)
+        return self._matchesFromPage(self._fetch(url, date, refresh))
+
+
+    @staticmethod
+    def _matchesUrl(dateInfo: str) -> Tuple[str, datetime.date]:
+        url = 'https://www.mysoccerleague.com/ViewRefAssignments.jsp?seasonId=0&leagueId=91&dateMode=allDates&date={0}'
 
         # convert from 'Day, Month Date, Year' i.e. (Saturday, September 24, 2022)
         # to m/d/year
@@ -144,14 +294,11 @@ class MySoccerLeague(RefereeWebSite):
         dateObject = datetime.datetime.strptime(f'{month} {day} {year}', '%B %d %Y')
         convertedDate = f'{dateObject.month}/{dateObject.day}/{dateObject.year}'
 
-        url = url.format(self._loginKey, convertedDate)
-        page = self._browser.open(url)
-
-        entries1 = page.soup.find_all("tr", { "class" : 'trstyle1' })
-        entries2 = page.soup.find_all("tr", { "class" : 'trstyle2' })
+        return url.format(convertedDate), dateObject.date()
 
-        entries = entries1 + entries2
 
+    @staticmethod
+    def _matchesFromPage(page: str) -> dict:
         '''
         Each entry is like this:  Organize by venue.
 
@@ -172,11 +319,10 @@ class MySoccerLeague(RefereeWebSite):
 
         retVal = {}
 
-        for entry in entries:
-            elements = entry.find_all('td')
-            ref1 = elements[9].text.strip('\n').strip('\r')
-            ref2 = elements[10].text.strip('\n').strip('\r')
-            ref3 = elements[11].text.strip('\n').strip('\r')
+        for row in iterMatchRows(page):
+            ref1 = row.center.strip('\n').strip('\r')
+            ref2 = row.ar1.strip('\n').strip('\r')
+            ref3 = row.ar2.strip('\n').strip('\r')
 
             # clean up the ref data as MSL can make a mess of it
             if ref1 in (' ', '\xa0', 'Not Used\n'):
@@ -186,182 +332,102 @@ class MySoccerLeague(RefereeWebSite):
             if ref3 in (' ', '\xa0', 'Not Used\n'):
                 ref3 = 'None'
 
-            field = elements[1].text.strip().strip('\n').strip('\r')
-            level = elements[3].text
-            gameTime = elements[2].text
-            age = elements[4].text
-            gameId = elements[0].text
+            field = row.venue.strip().strip('\n').strip('\r')
+            level = row.level
+            gameTime = row.gameTime
+            age = row.age
+            gameId = row.gameId
 
 
             if field not in retVal:
                 retVal[field] = []
 
-            data = {
-                'Center': ref1.replace('[VYS]', ''),
-                'AR1': ref2.replace('[VYS]', ''),
-                'AR2': ref3.replace('[VYS]', ''),
-                'Time': gameTime,
-                'Level' :level,
-                'Age': age,
-                'GameID' :gameId
-            }
-            retVal[field].append(data)
+            retVal[field].append(Match(ref1.replace('[VYS]', ''),
+                                       ref2.replace('[VYS]', ''),
+                                       ref3.replace('[VYS]', ''),
+                                       gameTime,
+                                       level,
+                                       age,
+                                       gameId))
 
         return retVal
 
 
-    def getAssignments(self):
-        for _ in range(3):
-            try:
-                results = {}
-
-                # MSL url for current assignments
-                # need to extract the key fom the login_result first
-                url = "https://www.mysoccerleague.com/ViewRefAssignments.jsp?YSLkey={0}&seasonId=0&leagueId=91&dateMode=futureDates&date={1}&startDate=9/8/21&endDate=11/19/21".format(self._loginKey, self._friday)
-                assignments_page = self._browser.open(url)
-                rowtype1 = assignments_page.soup.find_all("tr", { "class" : 'trstyle1'})
-                rowtype2 = assignments_page.soup.find_all("tr", { "class" : 'trstyle2'})
-                assignments = rowtype1 + rowtype2
-
-                self._parseAssignments(assignments, results, self._friday)
+    @staticmethod
+    def _assignmentsUrl(d: datetime.date) -> str:
+        # MSL url for the assignments of a single day
+        return "https://www.mysoccerleague.com/ViewRefAssignments.jsp?seasonId=0&leagueId=91&dateMode=futureDates&date={0}&startDate={0}&endDate={0}".format(d.strftime('%m/%d/%Y'))
 
-                url = "https://www.mysoccerleague.com/ViewRefAssignments.jsp?YSLkey={0}&seasonId=0&leagueId=91&dateMode=futureDates&date={1}&startDate=9/8/21&endDate=11/19/21".format(self._loginKey, self._saturday)
-                assignments_page = self._browser.open(url)
-                rowtype1 = assignments_page.soup.find_all("tr", { "class" : 'trstyle1'})
-                rowtype2 = assignments_page.soup.find_all("tr", { "class" : 'trstyle2'})
-                assignments = rowtype1 + rowtype2
 
-                self._parseAssignments(assignments, results, self._saturday)
+    def _getAssignmentsPage(self, d: datetime.date) -> str:
+        return self._fetch(self._assignmentsUrl(d), d)
 
-                url = "https://www.mysoccerleague.com/ViewRefAssignments.jsp?YSLkey={0}&seasonId=0&leagueId=91&dateMode=futureDates&date={1}&startDate=9/8/21&endDate=11/19/21".format(self._loginKey, self._sunday)
-                assignments_page = self._browser.open(url)
-                rowtype1 = assignments_page.soup.find_all("tr", { "class" : 'trstyle1'})
-                rowtype2 = assignments_page.soup.find_all("tr", { "class" : 'trstyle2'})
-                assignments = rowtype1 + rowtype2
 
-                self._parseAssignments(assignments, results, self._sunday)
-
-            except Exception:
-                time.sleep(3)
+    def getAssignments(self,
+                       dates: list = None,
+                       startDate: datetime.date = None,
+                       endDate: datetime.date = None) -> dict:
+        """
+        Get the assignments for a list of dates, or every day from startDate
+        through endDate (just startDate without one), organized by venue and
+        then game id.  Without either we get the weekend picked by
+        setSpecificDate.  Each date is fetched (and retried) on its own, all
+        of them at the same time.
+        """
+        dates = self._assignmentDates(dates, startDate, endDate,
+                                      [self._fridayDate, self._saturdayDate, self._sundayDate])
+        pages = self._concurrently(MySoccerLeague._getAssignmentsPage, dates)
+        return self._mergeAssignments(dates, pages)
+
+
+    @staticmethod
+    def _assignmentDates(dates: list, startDate: datetime.date, endDate: datetime.date, weekend: list) -> list:
+        # startDate on its own is just that day
+        if dates is None:
+            if startDate is not None:
+                if endDate is None:
+                    endDate = startDate
+                days = (endDate - startDate).days + 1
+                dates = [startDate + datetime.timedelta(n) for n in range(days)]
+            elif endDate is not None:
+                raise ValueError('getAssignments: endDate needs a startDate')
             else:
-                break
+                dates = weekend
+        return [datetime.datetime.strptime(d, '%m/%d/%Y').date() if isinstance(d, str) else d for d in dates]
 
+
+    @staticmethod
+    def _mergeAssignments(dates: list, pages: list) -> dict:
+        # merge in date order so the results look the same as fetching
+        # the dates one after the other
+        results = {}
+        for d, page in zip(dates, pages):
+            MySoccerLeague._parseAssignments(page, results, d.strftime('%m/%d/%Y'))
         return results
 
     def getAllReferees(self) -> list:
-        emails = None
-        retVal = None
-        for _ in range(3):
-            try:
-                url = 'https://www.mysoccerleague.com/AddRef.jsp?YSLkey={0}&actionName=Referees&showAll=true'.format(self._loginKey)
-                page = self._browser.open(url)
-
-                entries1 = page.soup.find_all("tr", { "class" : 'trstyle1' })
-                entries2 = page.soup.find_all("tr", { "class" : 'trstyle2' })
-
-                entries = entries1 + entries2
-
-                retVal = []
-                emails = []
-                for entry in entries:
-                    elements = entry.find_all('td')
-                    refereeFullName = elements[4].text
-                    emails.append(elements[7].text)
-                    try:
-                        firstName, lastName = refereeFullName.split(' ')
-                    except ValueError:
-                        f, l, x = refereeFullName.split(' ')
-                        # handle weirdness in MSL (three part names, extra spaces, etc.)
-
-                        last = None
-
-                        if f == 'Russell':
-                            if x == 'Bower':
-                                last = x
-                        elif f == 'Alexandre':
-                            if l == 'de':
-                                last = l + ' ' + x
-                        elif f == 'Will':
-                            if l == 'Covey' and x == 'III':
-                                last = l + ' ' + x
-                        elif f == 'Gabriella':
-                            if l == '(Brie)':
-                                last = l + ' ' + x
-                        elif f == 'Sophie':
-                            if x == 'Hinton':
-                                last = x
-                        elif f == 'Vivienne':
-                            if x == 'Huang':
-                                last = x
-                        elif f == 'Andrew':
-                            if x == 'Teale':
-                                last = x
-                        elif f == 'Gabi':
-                            if x == 'Konde':
-                                last = x
-                        elif f == 'James':
-                            if x == 'Horn':
-                                last = f"{l} {x}"
-                        elif f == 'Joseph':
-                            if x == 'Sandoval':
-                                last = f"{l} {x}"
-                            elif x == 'Howe':
-                                last = f"{l} {x}"
-                        elif f == 'Mohamed':
-                            if l == 'Nour':
-                                last = f"{l} {x}"
-                        elif f == 'Jack':
-                            if x == 'Raaphorst':
-                                last = f"{l} {x}"
-                        elif f == 'Laith':
-                            if x == 'Habri':
-                                last = f"{l} {x}"
-                        elif f == 'William':
-                            if l == 'Covey,':
-                                if x == 'Jr':
-                                    l = l.strip(',')
-                                    last = f"{l} {x}"
-                        elif f == 'Sofia':
-                            if l == 'Velasquez':
-                                last = f"{l} {x}"
-                        elif f == 'Martiel':
-                            if l == 'Ruiz':
-                                last = f"{l} {x}"
-                        elif f == 'Michael':
-                            if l == 'Aguilera':
-                                if x == 'Jr.':
-                                    last = f"{l} {x}"
-                        elif f == 'Mary':
-                            if l == 'Kate':
-                                f = f"{f} {l}"
-                                last = x
-                        elif f == "Tyler":
-                            if x == "Pechenik":
-                                last = x
-                        elif f == 'Rayan':
-                            if x == 'Hababi':
-                                last = f"{l} {x}"
-                        else:
-                            print(f'Error parsing: {refereeFullName}: f: {f} l: {l} x:{x}')
-
-                        if last is None:
-                            print(f'Error parsing: {refereeFullName}: f: {f} l: {l}, x:{x}')
-                        else:
-                            retVal.append((f.lower().strip(), last.lower().strip()))
-
-
-                    retVal.append((firstName.lower().strip(), lastName.lower().strip()))
-
-            except Exception:
-                time.sleep(3)
-            else:
-                break
-        self.emails = emails
+        retVal, self.emails = self._refereesFromPage(self._fetch(REFEREES_URL))
         return retVal
 
 
-    def getReportData(self, startDate: str, endDate: str):
-        url = f'https://mysoccerleague.com/GamesReportChoice.jsp?YSLkey={self._loginKey}&actionName=Game%20Reports'
+    @staticmethod
+    def _refereesFromPage(page: str) -> Tuple[list, list]:
+        retVal = []
+        emails = []
+        for row in iterRefereeRows(page):
+            emails.append(row.email)
+            # MSL names are typed in by hand, refNames knows their quirks
+            firstName, lastName = splitName(row.fullName)
+            if not firstName or not lastName:
+                print(f'Error parsing: {row.fullName}')
+                continue
+            retVal.append((firstName.lower().strip(), lastName.lower().strip()))
+
+        return retVal, emails
+
+
+    def getReportData(self, startDate: str, endDate: str, refresh: bool = False) -> str:
+        url = REPORT_CHOICE_URL
 
         # what is data and data2 for?
         data = f'YSLkey={self._loginKey}&returnJsp=ShowGameReports.jsp&dateMode=allDates&startDate=2023-11-17&endDate=2023-11-17&ageGroupFilter=all&genderFilter=all&classFilter=all&grSelect=1&grSelect=2&grSelect=3&filterButton=View+Reports'
@@ -380,21 +446,67 @@ class MySoccerLeague(RefereeWebSite):
             'filterButton': 'View+Reports'
         }
         #response = requests.post(url, json = data2)
-        self._browser.open(url)
-        self._browser.select_form('form')
-        self._browser['YSLkey'] = self._loginKey
-        self._browser['returnJsp'] = 'ShowGameReports.jsp'
-        self._browser['dateMode'] = 'selectDates'
-        self._browser['startDate'] = startDate
-        self._browser['endDate'] = endDate
-        response = self._browser.submit_selected()
-        return response
+        def submitReportForm(_):
+            self._download(self._siteUrl(url))
+            self._browser.select_form('form')
+            self._browser['YSLkey'] = self._loginKey
+            self._browser['returnJsp'] = 'ShowGameReports.jsp'
+            self._browser['dateMode'] = 'selectDates'
+            self._browser['startDate'] = startDate
+            self._browser['endDate'] = endDate
+            return _checkResponse(self._browser.submit_selected(timeout=requestTimeout))
+
+        cacheUrl, cacheDate = self._reportCacheKey(startDate, endDate)
+        return self._fetch(cacheUrl, cacheDate, refresh, submitReportForm)
 
 
-    def getReportForSeason(self, startDate: str, endDate: str) -> dict:
-        reportData = self.getReportData(startDate, endDate)
+    @staticmethod
+    def _reportCacheKey(startDate: str, endDate: str) -> Tuple[str, datetime.date]:
+        # the report is a form post, so the cache is keyed on the dates posted
+        cacheUrl = f'{REPORT_CHOICE_URL}&startDate={startDate}&endDate={endDate}'
+        return cacheUrl, datetime.datetime.strptime(endDate, '%Y-%m-%d').date()
 
-        metrics = {
+
+    def getReportForSeason(self, startDate: str, endDate: str, window: str = None) -> dict:
+        """
+        The season report is asked for a window (week or month) at a time,
+        all the windows at once.  Each window is cached on its own and the
+        ones that are over never expire, so running this again only asks
+        MSL for the current window.
+        """
+        windows = self._reportWindows(startDate, endDate, window or reportWindow)
+        metrics = self._concurrently(lambda site, w: site._metricsFromPage(site.getReportData(*w)),
+                                     windows)
+        return self._mergeMetrics(metrics)
+
+
+    @staticmethod
+    def _reportWindows(startDate: str, endDate: str, window: str) -> List[Tuple[str, str]]:
+        # calendar weeks (Monday to Sunday) or months, so the windows (and
+        # their cache entries) don't move when startDate does
+        start = datetime.datetime.strptime(startDate, '%Y-%m-%d').date()
+        end = datetime.datetime.strptime(endDate, '%Y-%m-%d').date()
+        if window not in ('week', 'month'):
+            raise ValueError(f'report window must be week or month, not {window}')
+
+        windows = []
+        d = start
+        while d <= end:
+            if window == 'week':
+                nextStart = d + datetime.timedelta(7 - d.weekday())
+            elif d.month == 12:
+                nextStart = datetime.date(d.year + 1, 1, 1)
+            else:
+                nextStart = datetime.date(d.year, d.month + 1, 1)
+            last = min(end, nextStart - datetime.timedelta(1))
+            windows.append((d.strftime('%Y-%m-%d'), last.strftime('%Y-%m-%d')))
+            d = nextStart
+        return windows
+
+
+    @staticmethod
+    def _emptyMetrics() -> dict:
+        return {
             "gamesPlayed": 0,
             "totalRefAssignments": 0,
             "refsAssigned": 0,
@@ -403,22 +515,33 @@ class MySoccerLeague(RefereeWebSite):
             "missingARs": 0
         }
 
-        entries = reportData.soup.find_all("tr", { "class" : 'trstyle2' })
 
-        metrics['gamesPlayed'] = len(entries)
+    @staticmethod
+    def _mergeMetrics(metrics: list) -> dict:
+        # zeros when there are no windows at all (startDate after endDate)
+        merged = MySoccerLeague._emptyMetrics()
+        for m in metrics:
+            for k, v in m.items():
+                merged[k] = merged.get(k, 0) + v
+        return merged
+
+
+    @staticmethod
+    def _metricsFromPage(reportData: str) -> dict:
+        metrics = MySoccerLeague._emptyMetrics()
 
-        for entry in entries:
-            elements = entry.find_all('td')
+        for row in iterReportRows(reportData):
+            metrics['gamesPlayed'] += 1
 
             refsNeeded = 3
-            if elements[3].text == 'U-9' or elements[3].text == 'U-10':
+            if row.age == 'U-9' or row.age == 'U-10':
                 refsNeeded = 1
             metrics['totalRefAssignments'] += refsNeeded
 
             refsAssigned = 0
-            ref1 = elements[8].text.strip('\xa0')
-            ref2 = elements[9].text.strip('\xa0')
-            ref3 = elements[10].text.strip('\xa0')
+            ref1 = row.center.strip('\xa0')
+            ref2 = row.ar1.strip('\xa0')
+            ref3 = row.ar2.strip('\xa0')
 
             if len(ref1) != 0:
                 refsAssigned += 1
@@ -0,0 +1,65 @@
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, TextIO
+
+"""
+Writes the mentoring reports a date at a time to a sink, as the rows come
+out of the database.  The report queries sort by date, so a date's
+sessions arrive together and nothing has to be held on to until the
+report is done.
+
+A sink has date(date) to start a date, session(entry) for each session on
+it and close() once the report is written.  TextSink is the plain text
+download, excelWriter.ExcelSink the spreadsheet.
+"""
+
+# a report row is
+# (firstname, lastname, position, date, comments, mentor_last_name, mentor_first_name)
+DATE = 3
+
+
+def sessionEntry(session: tuple) -> dict:
+    """ What the report shows for one row """
+    return {
+        'ref': f'{session[0].capitalize()} {session[1].capitalize()}',
+        'position': session[2],
+        'mentor': f'{session[6].capitalize()} {session[5].capitalize()}',
+        'comments': session[4]
+    }
+
+
+def writeReport(sessions: Iterable[tuple], sink) -> int:
+    """
+    Write sessions (sorted by date) to sink and close it.  Returns the
+    number of sessions written.
+    """
+    count = 0
+    for date, group in groupby(sessions, key=itemgetter(DATE)):
+        sink.date(date)
+        for session in group:
+            sink.session(sessionEntry(session))
+            count += 1
+    sink.close()
+    return count
+
+
+class TextSink(object):
+    """ The plain text report, written to out """
+
+    def __init__(self, out: TextIO):
+        self._out = out
+
+
+    def date(self, date) -> None:
+        self._out.write(f'Date: {date}\r\n')
+
+
+    def session(self, entry: dict) -> None:
+        self._out.write(f"\tReferee: {entry['ref']}\r\n"
+                        f"\tPosition: {entry['position']}\r\n"
+                        f"\tMentor: {entry['mentor']}\r\n"
+                        f"\tComments: {entry['comments']}\r\n\r\n")
+
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import requests
+
+
+class CircuitOpenError(Exception):
+    """ Raised instead of calling the site while the circuit is open """
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Stops calls to a site that keeps failing.  After failureThreshold
+    failures in a row the circuit opens and every call fails right away for
+    resetTimeout seconds, then one call is let through to see if the site
+    is back.
+    """
+
+    def __init__(self, failureThreshold: int = 5, resetTimeout: float = 60):
+        self._failureThreshold = failureThreshold
+        self._resetTimeout = resetTimeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._openedAt = None
+        self._trialRunning = False
+
+
+    def isOpen(self) -> bool:
+        return self._openedAt is not None
+
+
+    def before(self) -> None:
+        with self._lock:
+            if self._openedAt is None:
+                return
+            if time.monotonic() - self._openedAt < self._resetTimeout or self._trialRunning:
+                raise CircuitOpenError('the site has been failing, not trying again yet')
+            # half open, let this one call through
+            self._trialRunning = True
+
+
+    def recordSuccess(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._openedAt = None
+            self._trialRunning = False
+
+
+    def recordFailure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trialRunning or self._failures >= self._failureThreshold:
+                self._openedAt = time.monotonic()
+            self._trialRunning = False
+
+
+class RetryPolicy(object):
+    """
+    Calls a function, retrying the errors in retryOn with exponential
+    backoff and full jitter.  Any other error is raised right away.
+    """
+
+    def __init__(self,
+                 attempts: int = 3,
+                 baseDelay: float = 0.5,
+                 maxDelay: float = 8.0,
+                 retryOn: Tuple[type, ...] = (requests.ConnectionError, requests.Timeout, requests.HTTPError),
+                 breaker: CircuitBreaker = None):
+        self._attempts = attempts
+        self._baseDelay = baseDelay
+        self._maxDelay = maxDelay
+        self._retryOn = retryOn
+        self.breaker = breaker
+
+
+    def withRetryOn(self, retryOn: Tuple[type, ...]) -> 'RetryPolicy':
+        """ The same policy (and breaker) for a client that raises other errors """
+        return RetryPolicy(self._attempts, self._baseDelay, self._maxDelay, retryOn, self.breaker)
+
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self._maxDelay, self._baseDelay * 2 ** attempt))
+
+
+    # call() and callAsync() only differ in how they call and sleep, the
+    # decisions are all made here
+
+    def _starting(self) -> None:
+        if self.breaker is not None:
+            self.breaker.before()
+
+
+    def _answered(self) -> None:
+        # the site answered, even if it wasn't with what we wanted
+        if self.breaker is not None:
+            self.breaker.recordSuccess()
+
+
+    def _failed(self, attempt: int) -> Optional[float]:
+        """ attempt raised one of retryOn, the seconds to wait before the next one or None to give up """
+        if self.breaker is not None:
+            self.breaker.recordFailure()
+        if attempt == self._attempts - 1:
+            return None
+        return self._delay(attempt)
+
+
+    def call(self, func: Callable, *args, **kwargs):
+        for attempt in range(self._attempts):
+            self._starting()
+            try:
+                result = func(*args, **kwargs)
+            except self._retryOn:
+                delay = self._failed(attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            except Exception:
+                self._answered()
+                raise
+            else:
+                self._answered()
+                return result
+
+
+    async def callAsync(self, func: Callable, *args, **kwargs):
+        """ call() for a coroutine function """
+        for attempt in range(self._attempts):
+            self._starting()
+            try:
+                result = await func(*args, **kwargs)
+            except self._retryOn:
+                delay = self._failed(attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            except Exception:
+                self._answered()
+                raise
+            else:
+                self._answered()
+                return result
+
+
+# one policy (and so one breaker) for everything we ask of mysoccerleague.com
+mslRetry = RetryPolicy(attempts=int(os.environ.get('MSL_RETRY_ATTEMPTS', '3')),
+                       baseDelay=float(os.environ.get('MSL_RETRY_BASE_DELAY', '0.5')),
+                       maxDelay=float(os.environ.get('MSL_RETRY_MAX_DELAY', '8')),
+                       breaker=CircuitBreaker(int(os.environ.get('MSL_BREAKER_THRESHOLD', '5')),
+                                              float(os.environ.get('MSL_BREAKER_RESET', '60'))))
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# the modules live at the top of the repo, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    A RefereeDbCockroach on an empty schema of its own in TEST_DB_URL, with
+    its own pool and id caches.  Mark the test skipif TEST_DB_URL is unset.
+    """
+    psycopg = pytest.importorskip('psycopg')
+    import database
+
+    testDbUrl = os.environ['TEST_DB_URL']
+    with psycopg.connect(testDbUrl, autocommit=True) as connection:
+        connection.execute('DROP SCHEMA IF EXISTS database_test CASCADE')
+        connection.execute('CREATE SCHEMA database_test')
+    monkeypatch.setenv('db_url', psycopg.conninfo.make_conninfo(testDbUrl, options='-c search_path=database_test'))
+    monkeypatch.setattr(database, '_pool', None)
+    monkeypatch.setattr(database, '_schemaVersion', None)
+    monkeypatch.setattr(database, 'refereeIds', database.IdCache(10))
+    monkeypatch.setattr(database, 'mentorIds', database.IdCache(10))
+    yield database.RefereeDbCockroach()
+    database._pool.close()
+    with psycopg.connect(testDbUrl, autocommit=True) as connection:
+        connection.execute('DROP SCHEMA database_test CASCADE')
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from dataStore import DataStore
+from mslRecords import Match
+
+
+def snapshot(center):
+    dates = ['Saturday, September 13, 2025', 'Sunday, September 14, 2025']
+    return {
+        'published': datetime(2025, 9, 15, 8, 0),
+        'dates': dates,
+        'matches': { d: { 'Oak Marr': [Match(center, 'None', 'None', '8:00 AM', 'Rec', 'U-10', '1')] } for d in dates },
+        'referees': [('kate', 'curby')],
+        'emails': ['kate@example.com'],
+        'assignments': {},
+    }
+
+
+def test_nothing_published(tmp_path):
+    store = DataStore(str(tmp_path / 'snapshot.sqlite'))
+    assert store.load() is None
+    assert store.wait(timeout=0, poll=0) is None
+
+
+def test_readers_see_the_latest_version(tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite')
+    writer = DataStore(path)
+    reader = DataStore(path)
+    assert writer.publish(snapshot('Kate Curby')) == 1
+    loaded = reader.load()
+    assert loaded['referees'] == [('kate', 'curby')]
+    assert loaded['matches']['Sunday, September 14, 2025']['Oak Marr'][0]['Center'] == 'Kate Curby'
+
+    writer.publish(snapshot('Martin Cooley'))
+    loaded = reader.load()
+    assert loaded['version'] == 2
+    assert loaded['matches']['Saturday, September 13, 2025']['Oak Marr'][0]['Center'] == 'Martin Cooley'
+
+
+def test_only_one_lease_holder(tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite')
+    first = DataStore(path)
+    second = DataStore(path)
+    assert first.acquireLease('prefetch', 60)
+    assert not second.acquireLease('prefetch', 60)
+    # the holder keeps it
+    assert first.acquireLease('prefetch', 60)
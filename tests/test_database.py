@@ -0,0 +1,183 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+
+psycopg = pytest.importorskip('psycopg')
+
+from database import IdCache
+
+# see test_dbMigrations.py, never point TEST_DB_URL at the real database
+testDbUrl = os.environ.get('TEST_DB_URL')
+needsDb = pytest.mark.skipif(testDbUrl is None, reason='TEST_DB_URL is not set')
+
+DATE = 'Saturday, April 12, 2025'
+
+
+def rows(db, sql):
+    with db._cursor() as cursor:
+        return cursor.execute(sql).fetchall()
+
+
+class RecordingCursor(object):
+    """ Passes everything on to cursor, keeping the statements it runs """
+
+    def __init__(self, cursor, statements: list):
+        self._cursor = cursor
+        self._statements = statements
+
+    def execute(self, sql, params=None):
+        self._statements.append(' '.join(sql.split()))
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def recordStatements(monkeypatch, db) -> list:
+    statements = []
+    cursors = db._cursor
+    @contextmanager
+    def recording():
+        with cursors() as cursor:
+            yield RecordingCursor(cursor, statements)
+    monkeypatch.setattr(db, '_cursor', recording)
+    return statements
+
+
+@needsDb
+def test_sessions_resolve_names_the_way_msl_shows_them(db):
+    db.addMentor('pat', 'coach')
+    db.addReferee('de souza', 'alexandre', 2020)
+    db.addReferee('covey jr', 'william', 2020)
+    db.addReferee('bower', 'russell', 2021)
+
+    mentees = [('Alexandre de Souza', 'Center', False),
+               ('William Covey, Jr', 'AR1', False),
+               ('Russell X Bower', 'AR2', True),
+               ('None', 'AR2', False),
+               ('Madonna', 'AR2', False)]
+    results = db.addMentorSessions('pat coach', mentees, DATE, 'good game')
+
+    assert [ok for _, ok, _ in results] == [True, True, True, False, False]
+    assert results[3][2] == 'Could not find referee details for None'
+    # the ones we found went in anyway
+    assert len(rows(db, 'SELECT * FROM mentor_sessions')) == 3
+    assert len(rows(db, 'SELECT * FROM risky')) == 1
+
+    ok, message = db.addMentorSession('pat coach', 'Madonna', 'Center', DATE, '')
+    assert not ok and message == 'Could not find referee details for Madonna'
+
+
+def test_id_cache_hit_skips_the_lookup():
+    cache = IdCache(10)
+    lookups = []
+    def lookup():
+        lookups.append(1)
+        return 7
+    assert cache.get(('a', 'b'), lookup) == 7
+    assert cache.get(('a', 'b'), lookup) == 7
+    assert len(lookups) == 1
+    assert cache.stats() == { 'hits': 1, 'misses': 1, 'size': 1 }
+
+
+def test_id_cache_does_not_keep_names_it_did_not_find():
+    cache = IdCache(10)
+    assert cache.get(('a', 'b'), lambda: None) is None
+    assert cache.get(('a', 'b'), lambda: 3) == 3
+
+
+def test_id_cache_drops_the_least_recently_used():
+    cache = IdCache(2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    # a is now the most recently used, so c pushes b out
+    cache.get('a', lambda: None)
+    cache.get('c', lambda: 3)
+    assert cache.get('a', lambda: None) == 1
+    assert cache.get('c', lambda: None) == 3
+    assert cache.get('b', lambda: None) is None
+    assert cache.stats()['size'] == 2
+
+
+def countCalls(monkeypatch, db, name):
+    calls = []
+    method = getattr(db, name)
+    def counted(*args):
+        calls.append(args)
+        return method(*args)
+    monkeypatch.setattr(db, name, counted)
+    return calls
+
+
+@needsDb
+def test_found_referee_ids_are_cached_until_a_referee_is_added(db, monkeypatch):
+    db.addReferee('bower', 'russell', 2021)
+    queries = countCalls(monkeypatch, db, 'findReferee')
+
+    refId = db.findRefereeId('Bower', 'Russell')
+    assert db.findRefereeId('bower', 'russell') == refId
+    assert len(queries) == 1
+
+    # somebody with the same name, the next lookup goes to the database
+    db.addReferee('Bower', 'Russell', 2024)
+    assert db.findRefereeId('bower', 'russell') is not None
+    assert len(queries) == 2
+
+
+@needsDb
+def test_found_mentor_ids_are_cached_until_a_mentor_is_added(db, monkeypatch):
+    db.addMentor('pat', 'coach')
+    queries = countCalls(monkeypatch, db, 'findMentor')
+
+    mentorId = db.findMentorId('Pat', 'Coach')
+    assert db.findMentorId('pat', 'coach') == mentorId
+    assert len(queries) == 1
+
+    db.addMentor('pat', 'coach')
+    db.findMentorId('pat', 'coach')
+    assert len(queries) == 2
+    assert db.idCacheStats()['mentors']['hits'] == 1
+
+
+@needsDb
+def test_sync_referees_inserts_only_the_new_ones_in_one_statement(db, monkeypatch):
+    db.addReferee('bower', 'russell', 2021)
+    statements = recordStatements(monkeypatch, db)
+
+    added = db.syncReferees([('Bower', 'Russell', 2021),
+                             ('horn', 'james', 2022),
+                             ('hinton', 'sophie', 2023),
+                             ('Horn', 'James', 2022)])
+
+    assert added == [('horn', 'james', 2022), ('hinton', 'sophie', 2023)]
+    assert len(statements) == 2
+    assert statements[1].startswith('INSERT INTO referees') and statements[1].count('(%s, %s, %s)') == 2
+    assert sorted(rows(db, 'SELECT lastname, firstname FROM referees')) == [('bower', 'russell'), ('hinton', 'sophie'), ('horn', 'james')]
+
+    # nothing new, nothing inserted
+    del statements[:]
+    assert db.syncReferees([('hinton', 'sophie', 2023)]) == []
+    assert len(statements) == 1
+
+
+def game(center, date='09/13/2025', time='8:00 AM'):
+    return { 'Center': center, 'AR1': 'Not Used', 'AR2': 'Not Used', 'date': date,
+             'gameTime': time, 'age': 'U12', 'level': 'Rec' }
+
+
+@needsDb
+def test_add_game_details_counts_the_games_already_stored(db):
+    weekend = { 'Field 1': { '748590': game('Russell Bower'),
+                             '748591': game('James X Horn', time='9:30 AM') },
+                'Field 2': { '748592': game('Sophie Hinton', date='09/14/2025'),
+                             # the same game under a conflict, sent once
+                             '748590VENUE CONFLICT': game('Russell Bower') } }
+    assert db.addGameDetails(weekend) == (3, 0)
+
+    # a rerun after one more game was assigned
+    weekend['Field 2']['748593'] = game('Pat Coach', date='09/14/2025')
+    assert db.addGameDetails(weekend) == (1, 3)
+    assert len(rows(db, 'SELECT * FROM gamedetails')) == 4
+
+    assert db.addGameDetails({}) == (0, 0)
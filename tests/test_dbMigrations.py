@@ -0,0 +1,92 @@
+import os
+from datetime import datetime
+
+import pytest
+
+psycopg = pytest.importorskip('psycopg')
+
+from database import seasonOf
+from dbMigrations import HOT_QUERIES, LATEST_VERSION, MIGRATIONS, SEASON_SQL, fullScans, migrate, schemaVersion
+
+# a database the tests can do what they like with, i.e. a PostgreSQL
+# container in CI.  Never point it at the real one
+testDbUrl = os.environ.get('TEST_DB_URL')
+needsDb = pytest.mark.skipif(testDbUrl is None, reason='TEST_DB_URL is not set')
+
+
+def test_migrations_are_numbered_in_order():
+    assert [m[0] for m in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
+    assert LATEST_VERSION == len(MIGRATIONS)
+
+
+@pytest.fixture
+def cursor():
+    with psycopg.connect(testDbUrl, autocommit=True) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS migrations_test CASCADE')
+            cursor.execute('CREATE SCHEMA migrations_test')
+            cursor.execute('SET search_path TO migrations_test')
+            yield cursor
+            cursor.execute('DROP SCHEMA migrations_test CASCADE')
+
+
+@needsDb
+def test_migrate_a_new_database(cursor):
+    assert schemaVersion(cursor) == 0
+    assert migrate(cursor) == LATEST_VERSION
+    # and again, nothing to do
+    assert migrate(cursor) == LATEST_VERSION
+
+
+@needsDb
+def test_hot_queries_use_indexes(cursor):
+    migrate(cursor)
+    scans = fullScans(cursor)
+    assert scans == [], [HOT_QUERIES[name] for name in scans]
+
+
+@needsDb
+def test_a_missing_index_is_found(cursor):
+    migrate(cursor)
+    cursor.execute('DROP INDEX mentor_sessions_mentee_idx')
+    assert fullScans(cursor) == ['sessionsForMentee']
+
+
+@needsDb
+def test_season_sql_agrees_with_seasonOf(cursor):
+    # either side of every boundary, and the year turning
+    for day in ['2024-12-31', '2025-01-01', '2025-03-31', '2025-04-01',
+                '2025-06-30 23:59', '2025-07-01', '2025-12-31 23:59']:
+        date = datetime.fromisoformat(day)
+        sql = f"SELECT EXTRACT(YEAR FROM ms.date)::INTEGER, {SEASON_SQL} FROM (SELECT %s::TIMESTAMP AS date) ms"
+        assert cursor.execute(sql, (date,)).fetchone() == seasonOf(date), day
+
+
+@needsDb
+def test_rollup_kept_by_sessions_matches_a_rebuild(db):
+    db.addMentor('pat', 'coach')
+    db.addMentor('sam', 'whistle')
+    for last in ['bower', 'horn', 'hinton']:
+        db.addReferee(last, 'ref', 2020)
+
+    for mentor, mentee, date in [('pat coach', 'Ref Bower', 'Monday, March 31, 2025'),
+                                 ('pat coach', 'Ref Bower', 'Tuesday, April 1, 2025'),
+                                 ('pat coach', 'Ref Bower', 'Saturday, April 12, 2025'),
+                                 ('sam whistle', 'Ref Bower', 'Monday, June 30, 2025'),
+                                 ('sam whistle', 'Ref Horn', 'Tuesday, July 1, 2025'),
+                                 ('pat coach', 'Ref Hinton', 'Wednesday, December 31, 2025'),
+                                 ('pat coach', 'Ref Hinton', 'Thursday, January 1, 2026')]:
+        assert db.addMentorSession(mentor, mentee, 'Center', date, '')[0]
+    db.addMentorSessions('sam whistle', [('Ref Horn', 'AR1', True), ('Ref Hinton', 'AR2', False)],
+                         'Saturday, September 6, 2025', '')
+
+    seasons = [(year, season) for year in (2025, 2026) for season in ('winter', 'spring', 'fall')]
+    kept = [db.getMentoringSessionMetrics(year, season) for year, season in seasons]
+    with db._cursor() as cursor:
+        rollup = sorted(cursor.execute('SELECT * FROM mentoring_rollup').fetchall())
+
+    db.rebuildMentoringRollup()
+    assert [db.getMentoringSessionMetrics(year, season) for year, season in seasons] == kept
+    with db._cursor() as cursor:
+        assert sorted(cursor.execute('SELECT * FROM mentoring_rollup').fetchall()) == rollup
+    assert kept[1] == { 'mentors': 2, 'referees': 1, 'reports': 3 }
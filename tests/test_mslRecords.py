@@ -0,0 +1,33 @@
+import pickle
+
+from mslRecords import Assignment, Match, SeasonMatches
+
+
+def match(center='Kate Curby', gameId='748590'):
+    return Match(center, 'Bill Chappell', 'None', '8:00 AM', 'Rec', 'U-12', gameId)
+
+
+def test_match_reads_like_a_dict():
+    game = match()
+    assert game['Center'] == 'Kate Curby'
+    assert game.get('GameID') == '748590'
+    assert game.get('Venue', 'none') == 'none'
+    assert 'AR1' in game
+    assert game == dict(game.items())
+    assert pickle.loads(pickle.dumps(game)) == game
+
+
+def test_assignment_keys():
+    assignment = Assignment('Kate Curby', 'None', 'None', '09/13/2025', '8:00 AM', 'U-10', 'Rec')
+    assert list(assignment.keys()) == ['Center', 'AR1', 'AR2', 'date', 'gameTime', 'age', 'level']
+
+
+def test_season_matches_round_trip():
+    season = {
+        'Saturday, September 13, 2025': { 'Ken Lawrence #2': [match(), match('Martin Cooley', '748591')] },
+        'Sunday, September 14, 2025': { 'Oak Marr': [match(gameId='748592')], 'Ken Lawrence #2': [] },
+    }
+    stored = pickle.loads(pickle.dumps(SeasonMatches(season)))
+    assert list(stored) == list(season)
+    for date, venues in season.items():
+        assert stored[date] == venues
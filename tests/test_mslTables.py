@@ -0,0 +1,29 @@
+import glob
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from mslTables import ROW_CLASSES, iterRows
+from mslStandIn import fixtureDir
+
+
+def soupRows(page, classes):
+    # what the scraper did before mslTables
+    rows = BeautifulSoup(page, 'lxml').find_all('tr', class_=list(classes))
+    return [tuple(cell.text for cell in row.find_all('td')) for row in rows]
+
+
+@pytest.mark.parametrize('path', sorted(glob.glob(os.path.join(fixtureDir, '*.html'))),
+                         ids=os.path.basename)
+@pytest.mark.parametrize('classes', [ROW_CLASSES, ('trstyle2',)])
+def test_iterRows_matches_beautifulsoup(path, classes):
+    with open(path, 'r', encoding='utf-8') as fp:
+        page = fp.read()
+    assert list(iterRows(page, classes)) == soupRows(page, classes)
+
+
+def test_iterRows_matches_any_class():
+    page = '''<table><tr class="trstyle1 highlight"><td>a</td></tr><tr class="trheader"><td>b</td></tr>
+              <tr><td>c</td></tr><tr class="trstyle2"><td>d</td><td>e</td></tr></table>'''
+    assert list(iterRows(page)) == soupRows(page, ROW_CLASSES) == [('a',), ('d', 'e')]
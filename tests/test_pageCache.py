@@ -0,0 +1,38 @@
+import datetime
+import os
+
+from pageCache import PageCache
+
+
+def test_past_dates_never_expire(tmp_path):
+    cache = PageCache(str(tmp_path), ttl=0)
+    past = datetime.date.today() - datetime.timedelta(days=1)
+    cache.put('http://msl/page?a=1', past, 'old page')
+    assert cache.get('http://msl/page?a=1', past) == 'old page'
+    # today's pages are only good for ttl seconds
+    cache.put('http://msl/page?a=1', datetime.date.today(), 'new page')
+    assert cache.get('http://msl/page?a=1', datetime.date.today()) is None
+
+
+def test_pages_are_keyed_on_url_and_date(tmp_path):
+    cache = PageCache(str(tmp_path), ttl=60)
+    cache.put('http://msl/page?a=1', None, 'one')
+    assert cache.get('http://msl/page?a=1') == 'one'
+    assert cache.get('http://msl/page?a=2') is None
+    assert cache.get('http://msl/page?a=1', datetime.date(2020, 1, 1)) is None
+
+
+def test_force_refresh(tmp_path):
+    cache = PageCache(str(tmp_path), ttl=60)
+    cache.put('http://msl/page', None, 'one')
+    cache.forceRefresh = True
+    assert cache.get('http://msl/page') is None
+
+
+def test_clear_removes_pages_and_interrupted_puts(tmp_path):
+    cache = PageCache(str(tmp_path), ttl=60)
+    cache.put('http://msl/page', None, 'one')
+    (tmp_path / 'nodate-abc.html.0123.tmp').write_text('half a page')
+    (tmp_path / 'snapshot.sqlite').write_text('not ours')
+    cache.clear()
+    assert os.listdir(tmp_path) == ['snapshot.sqlite']
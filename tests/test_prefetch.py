@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+import prefetch
+from mslRecords import Match, SeasonMatches
+
+FINISHED = 'Saturday, September 13, 2025'
+NEW = 'Sunday, September 14, 2025'
+UPCOMING = (date.today() + timedelta(days=7)).strftime('%A, %B %d, %Y')
+
+
+class FakeSite(object):
+    emails = ['kate@example.com']
+
+    def __init__(self, dates):
+        self._dates = dates
+
+    def getAllDatesForSeason(self, refresh=False):
+        return self._dates
+
+    def getAllReferees(self):
+        return [('kate', 'curby')]
+
+    def setSpecificDate(self, date):
+        pass
+
+    def getAssignments(self):
+        return {}
+
+
+def matches(center):
+    return { 'Oak Marr': [Match(center, 'None', 'None', '8:00 AM', 'Rec', 'U-10', '1')] }
+
+
+def fakeScrape(monkeypatch, dates):
+    fetches = []
+    def fetchMatches(wanted, workers, refresh=False):
+        fetches.append((wanted, refresh))
+        return { d: matches('Fetched') for d in wanted }
+    monkeypatch.setattr(prefetch, '_newSite', lambda: FakeSite(dates))
+    monkeypatch.setattr(prefetch, '_fetchMatches', fetchMatches)
+    return fetches
+
+
+def test_first_snapshot_fetches_every_date(monkeypatch):
+    fetches = fakeScrape(monkeypatch, [FINISHED, UPCOMING])
+    snapshot = prefetch.buildSnapshot()
+    assert fetches == [([FINISHED, UPCOMING], False)]
+    assert snapshot['dates'] == [FINISHED, UPCOMING]
+    assert snapshot['referees'] == [('kate', 'curby')]
+
+
+def test_finished_dates_come_from_the_previous_snapshot(monkeypatch):
+    fetches = fakeScrape(monkeypatch, [FINISHED, NEW, UPCOMING])
+    previous = { 'matches': SeasonMatches({ FINISHED: matches('Kept'), UPCOMING: matches('Kept') }) }
+
+    snapshot = prefetch.buildSnapshot(previous)
+
+    # the date we never saw and the one still to be played, fresh from MSL
+    assert fetches == [([NEW, UPCOMING], True)]
+    assert list(snapshot['matches']) == [FINISHED, NEW, UPCOMING]
+    assert snapshot['matches'][FINISHED]['Oak Marr'][0]['Center'] == 'Kept'
+    assert snapshot['matches'][NEW]['Oak Marr'][0]['Center'] == 'Fetched'
+    assert snapshot['matches'][UPCOMING]['Oak Marr'][0]['Center'] == 'Fetched'
@@ -0,0 +1,62 @@
+import pytest
+
+from refNames import nameKey, splitName
+
+
+# every name the old if/elif chain in getAllReferees special cased, with
+# what it made of them (lower case, as it stored them)
+OLD_CHAIN = [
+    ('Russell James Bower', ('russell', 'bower')),
+    ('Alexandre de Souza', ('alexandre', 'de souza')),
+    ('Will Covey III', ('will', 'covey iii')),
+    ('Gabriella (Brie) Stone', ('gabriella', '(brie) stone')),
+    ('Sophie Anne Hinton', ('sophie', 'hinton')),
+    ('Vivienne Mei Huang', ('vivienne', 'huang')),
+    ('Andrew John Teale', ('andrew', 'teale')),
+    ('Gabi Rose Konde', ('gabi', 'konde')),
+    ('James Van Horn', ('james', 'van horn')),
+    ('Joseph Garcia Sandoval', ('joseph', 'garcia sandoval')),
+    ('Joseph St Howe', ('joseph', 'st howe')),
+    ('Mohamed Nour Eldin', ('mohamed', 'nour eldin')),
+    ('Jack van Raaphorst', ('jack', 'van raaphorst')),
+    ('Laith Al Habri', ('laith', 'al habri')),
+    ('William Covey, Jr', ('william', 'covey jr')),
+    ('Sofia Velasquez Ortiz', ('sofia', 'velasquez ortiz')),
+    ('Martiel Ruiz Diaz', ('martiel', 'ruiz diaz')),
+    ('Michael Aguilera Jr.', ('michael', 'aguilera jr.')),
+    ('Mary Kate Smith', ('mary kate', 'smith')),
+    ('Tyler Scott Pechenik', ('tyler', 'pechenik')),
+    ('Rayan El Hababi', ('rayan', 'el hababi')),
+    ('Kate Curby', ('kate', 'curby')),
+]
+
+
+@pytest.mark.parametrize('name, expected', OLD_CHAIN)
+def test_splitName_matches_the_old_chain(name, expected):
+    first, last = splitName(name)
+    assert (first.lower(), last.lower()) == expected
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Kate  Curby ', ('Kate', 'Curby')),
+    ('Aguilera, Michael Jr.', ('Michael', 'Aguilera')),
+    ('Cher', ('Cher', '')),
+    ('(requested)', (None, None)),
+    ('', (None, None)),
+])
+def test_splitName_general_rules(name, expected):
+    assert splitName(name) == expected
+
+
+def test_unknown_three_part_name_is_reported(capsys):
+    assert splitName('Sam Lee Smith') == ('Sam', 'Lee Smith')
+    assert 'Sam Lee Smith' in capsys.readouterr().out
+    # only the first time
+    splitName('Sam Lee Smith')
+    assert capsys.readouterr().out == ''
+
+
+def test_nameKey():
+    assert nameKey('Russell James  Bower') == 'russell bower'
+    assert nameKey('William Covey, Jr') == 'william covey jr'
+    assert nameKey('(requested)') == '(requested)'
@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+
+import pytest
+
+from asyncRefWebSites import AsyncMySoccerLeague
+
+from mslSession import MslSession
+from mslStandIn import fixtureDir
+from pageCache import PageCache
+from refWebSites import MySoccerLeague
+from retryPolicy import RetryPolicy
+
+
+class Response(object):
+
+    def __init__(self, text):
+        self.ok = True
+        self.text = text
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setenv('mslUsername', 'user')
+    monkeypatch.setenv('mslPassword', 'password')
+    monkeypatch.delenv('MSL_BASE_URL', raising=False)
+    return MySoccerLeague(None, PageCache(str(tmp_path), ttl=60), MslSession(), RetryPolicy(attempts=1))
+
+
+def test_fetch_caches_pages(site):
+    past = datetime.date(2025, 9, 13)
+    assert site._fetch('https://mysoccerleague.com/page?a=1', past, download=lambda url: Response('<table></table>')) == '<table></table>'
+    assert site._cache.get('https://mysoccerleague.com/page?a=1', past) == '<table></table>'
+
+
+def test_fetch_never_caches_the_login_form(site):
+    with open(f'{fixtureDir}/login.html', 'r', encoding='utf-8') as fp:
+        login = fp.read()
+    past = datetime.date(2025, 9, 13)
+    site._fetch('https://mysoccerleague.com/page?a=1', past, download=lambda url: Response(login))
+    assert site._cache.get('https://mysoccerleague.com/page?a=1', past) is None
+
+
+def test_report_windows():
+    assert MySoccerLeague._reportWindows('2025-09-27', '2025-10-08', 'week') == [
+        ('2025-09-27', '2025-09-28'), ('2025-09-29', '2025-10-05'), ('2025-10-06', '2025-10-08')]
+    assert MySoccerLeague._reportWindows('2025-09-27', '2025-10-08', 'month') == [
+        ('2025-09-27', '2025-09-30'), ('2025-10-01', '2025-10-08')]
+    with pytest.raises(ValueError):
+        MySoccerLeague._reportWindows('2025-09-27', '2025-10-08', 'year')
+
+
+def test_no_report_windows_is_all_zeros(site):
+    metrics = site.getReportForSeason('2025-10-01', '2025-09-01')
+    assert metrics == MySoccerLeague._emptyMetrics()
+    assert metrics['gamesPlayed'] == 0
+
+
+def assignmentsPage():
+    with open(f'{fixtureDir}/assignments.html', 'r', encoding='utf-8') as fp:
+        return fp.read()
+
+
+def fetchedDates(site, **kwargs):
+    fetched = []
+    def concurrently(work, dates):
+        fetched.extend(dates)
+        return [assignmentsPage()] * len(dates)
+    site._concurrently = concurrently
+    site.getAssignments(**kwargs)
+    return fetched
+
+
+def test_assignments_for_a_start_date_alone_are_that_day(site):
+    day = datetime.date(2025, 9, 13)
+    assert fetchedDates(site, startDate=day) == [day]
+    assert fetchedDates(site, startDate=day, endDate=datetime.date(2025, 9, 14)) == [day, datetime.date(2025, 9, 14)]
+    assert fetchedDates(site, dates=['09/13/2025']) == [day]
+    with pytest.raises(ValueError, match='startDate'):
+        site.getAssignments(endDate=day)
+
+
+def test_async_assignments_for_a_start_date_alone_are_that_day(tmp_path, monkeypatch):
+    monkeypatch.setenv('mslUsername', 'user')
+    monkeypatch.setenv('mslPassword', 'password')
+    day = datetime.date(2025, 9, 13)
+
+    async def assignments(**kwargs):
+        site = AsyncMySoccerLeague(1, PageCache(str(tmp_path)), RetryPolicy(attempts=1), MslSession())
+        fetched = []
+        async def fetch(url, d, refresh=False):
+            fetched.append(d)
+            return assignmentsPage()
+        site._fetch = fetch
+        await site.getAssignments(**kwargs)
+        return fetched
+
+    assert asyncio.run(assignments(startDate=day)) == [day]
+    with pytest.raises(ValueError, match='startDate'):
+        asyncio.run(assignments(endDate=day))
+
+
+def test_merged_assignments_follow_the_dates():
+    page = assignmentsPage()
+    saturday, sunday = datetime.date(2025, 9, 13), datetime.date(2025, 9, 14)
+    oneDay = MySoccerLeague._mergeAssignments([saturday], [page])
+
+    merged = MySoccerLeague._mergeAssignments([saturday, sunday], [page, page])
+    # venues and games in the order the first date listed them
+    assert [(venue, list(games)) for venue, games in merged.items()] == \
+        [(venue, list(games)) for venue, games in oneDay.items()]
+    # and a game id on both dates ends up with the later one, as if the
+    # dates had been fetched one after the other
+    assert {game['date'] for games in merged.values() for game in games.values()} == {'09/14/2025'}
+    merged = MySoccerLeague._mergeAssignments([sunday, saturday], [page, page])
+    assert {game['date'] for games in merged.values() for game in games.values()} == {'09/13/2025'}
+
+
+def test_async_fetch_caches_pages(tmp_path, monkeypatch):
+    monkeypatch.setenv('mslUsername', 'user')
+    monkeypatch.setenv('mslPassword', 'password')
+    past = datetime.date(2025, 9, 13)
+
+    async def fetch():
+        site = AsyncMySoccerLeague(1, PageCache(str(tmp_path), ttl=60), RetryPolicy(attempts=1), MslSession())
+        async def download(url):
+            return '<table></table>'
+        page = await site._fetch('https://mysoccerleague.com/page?a=1', past, download=download)
+        async def fail(url):
+            raise AssertionError('should have come from the cache')
+        return page, await site._fetch('https://mysoccerleague.com/page?a=1', past, download=fail)
+
+    assert asyncio.run(fetch()) == ('<table></table>', '<table></table>')
@@ -0,0 +1,39 @@
+from datetime import datetime
+from io import StringIO
+
+from reports import TextSink, writeReport
+
+
+def row(first, date, comments='Good game'):
+    return (first, 'curby', 'Center', date, comments, 'helfgott', 'david')
+
+
+def test_text_report_groups_by_date():
+    sessions = [row('kate', datetime(2025, 9, 13)),
+                row('bob', datetime(2025, 9, 13), 'Late: 5 minutes'),
+                row('kate', datetime(2025, 9, 14))]
+    out = StringIO()
+    assert writeReport(iter(sessions), TextSink(out)) == 3
+    assert out.getvalue() == ('Date: 2025-09-13 00:00:00\r\n'
+                              '\tReferee: Kate Curby\r\n\tPosition: Center\r\n\tMentor: David Helfgott\r\n\tComments: Good game\r\n\r\n'
+                              '\tReferee: Bob Curby\r\n\tPosition: Center\r\n\tMentor: David Helfgott\r\n\tComments: Late: 5 minutes\r\n\r\n'
+                              'Date: 2025-09-14 00:00:00\r\n'
+                              '\tReferee: Kate Curby\r\n\tPosition: Center\r\n\tMentor: David Helfgott\r\n\tComments: Good game\r\n\r\n')
+
+
+def test_empty_report():
+    out = StringIO()
+    assert writeReport([], TextSink(out)) == 0
+    assert out.getvalue() == ''
+
+
+def test_excel_report_keeps_comments_whole():
+    import zipfile
+    from io import BytesIO
+
+    from excelWriter import getExcelFromSessions
+
+    sessions = [row('kate', datetime(2025, 9, 13), 'Late: 5 minutes\nTalked at half: offside')]
+    sheet = zipfile.ZipFile(BytesIO(getExcelFromSessions(sessions))).read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert 'Late: 5 minutes\nTalked at half: offside' in sheet
+    assert '2025-09-13 00:00:00' in sheet
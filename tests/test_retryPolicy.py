@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from retryPolicy import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+class Flaky(object):
+    """ Raises the errors it is given, one per call, then answers """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'page'
+
+    async def asynchronously(self):
+        return self()
+
+
+def policy(**kwargs):
+    return RetryPolicy(baseDelay=0, maxDelay=0, retryOn=(ConnectionError,), **kwargs)
+
+
+def test_retries_then_answers():
+    flaky = Flaky(ConnectionError(), ConnectionError())
+    assert policy(attempts=3).call(flaky) == 'page'
+    assert flaky.calls == 3
+
+
+def test_gives_up_after_attempts():
+    flaky = Flaky(*[ConnectionError()] * 3)
+    with pytest.raises(ConnectionError):
+        policy(attempts=3).call(flaky)
+    assert flaky.calls == 3
+
+
+def test_other_errors_are_not_retried():
+    flaky = Flaky(ValueError())
+    with pytest.raises(ValueError):
+        policy(attempts=3).call(flaky)
+    assert flaky.calls == 1
+
+
+def test_breaker_opens_and_fails_fast():
+    retry = policy(attempts=1, breaker=CircuitBreaker(failureThreshold=2, resetTimeout=60))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            retry.call(Flaky(ConnectionError()))
+    flaky = Flaky()
+    with pytest.raises(CircuitOpenError):
+        retry.call(flaky)
+    assert flaky.calls == 0
+
+
+def test_breaker_lets_a_trial_through_after_reset():
+    breaker = CircuitBreaker(failureThreshold=1, resetTimeout=0)
+    retry = policy(attempts=1, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        retry.call(Flaky(ConnectionError()))
+    assert breaker.isOpen()
+    assert retry.call(Flaky()) == 'page'
+    assert not breaker.isOpen()
+
+
+def test_callAsync_behaves_like_call():
+    breaker = CircuitBreaker(failureThreshold=5, resetTimeout=60)
+    flaky = Flaky(ConnectionError(), ConnectionError())
+    assert asyncio.run(policy(attempts=3, breaker=breaker).callAsync(flaky.asynchronously)) == 'page'
+    assert flaky.calls == 3
+    assert not breaker.isOpen()
+
+    flaky = Flaky(*[ConnectionError()] * 3)
+    with pytest.raises(ConnectionError):
+        asyncio.run(policy(attempts=3).callAsync(flaky.asynchronously))
+    assert flaky.calls == 3
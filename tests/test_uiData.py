@@ -0,0 +1,36 @@
+import prefetch
+import uiData
+from dataStore import DataStore
+from test_dataStore import snapshot
+
+
+def useStore(monkeypatch, tmp_path) -> DataStore:
+    store = DataStore(str(tmp_path / 'snapshot.sqlite'))
+    monkeypatch.setattr(uiData, 'store', store)
+    # nobody else is going to publish one
+    monkeypatch.setattr(uiData, 'prefetchMode', 'process')
+    monkeypatch.setattr(uiData, 'snapshotWait', 0)
+    return store
+
+
+def test_scrapes_itself_when_nothing_is_published(monkeypatch, tmp_path):
+    store = useStore(monkeypatch, tmp_path)
+    scrapes = []
+    def prefetchOnce(store, workers=None):
+        scrapes.append(workers)
+        store.publish(snapshot('Kate Curby'))
+    monkeypatch.setattr(prefetch, 'prefetchOnce', prefetchOnce)
+
+    loaded = uiData.getSnapshot(workers=3)
+    assert scrapes == [3]
+    assert loaded['referees'] == [('kate', 'curby')]
+    assert store.load()['dates'] == loaded['dates']
+
+
+def test_uses_the_published_snapshot(monkeypatch, tmp_path):
+    store = useStore(monkeypatch, tmp_path)
+    store.publish(snapshot('Kate Curby'))
+    monkeypatch.setattr(prefetch, 'prefetchOnce', lambda store, workers=None: 1 / 0)
+
+    matches = uiData.getAllData()
+    assert matches[uiData.dates[0]]['Oak Marr'][0]['Center'] == 'Kate Curby'
@@ -9,16 +9,13 @@ import streamlit as st
 from streamlit_calendar import calendar
 
 from streamlit_pills import pills
-import time
-from typing import Tuple
 
 from database import RefereeDbCockroach
-from excelWriter import getExcelFromText
 from googleSheets import credFile
 from auth import AuthManager, requireAuth, showUserManagement
 
 from main import run
-from uiData import getAllData
+from uiData import getAllData, getSnapshot
 
 
 @contextmanager
@@ -54,7 +51,11 @@ if streamlitCloud == 'False':
         st.stop()
 
 # get all the data we can, avoids a bunch of calls to the website
-allMatchData = getAllData()
+try:
+    allMatchData = getAllData()
+except Exception as ex:
+    st.error(f'Could not get the match data from MySoccerLeague, please try again in a few minutes: {ex}', icon="🚨")
+    st.stop()
 dates = list(allMatchData.keys())
 
 db = RefereeDbCockroach()
@@ -129,48 +130,6 @@ if tab == "Enter a Mentor Report":
 
     selectionBoxData = yearData
 
-    def parseRefName(name: str) -> Tuple[str, str]:
-        '''
-        This handles all the idiosyncrasies of peoples names as configured
-        in MSL.
-        '''
-        #st.write(f'refname: {name}')
-        if name == '(requested)':
-            return [None, None]
-
-        # Remove extra spaces and trim
-        name = ' '.join(name.split())
-
-        # Handle comma-separated format like "Aguilera, Michael Jr."
-        parts = name.split(',')
-        if len(parts) > 1:
-            # For "Last, First [Suffix]" format
-            first_parts = parts[1].strip().split()
-            return [first_parts[0], parts[0].strip()]
-
-        # Handle format with no comma like "Michael Aguilera Jr."
-        parts = name.split(' ')
-        if len(parts) == 0:
-            return [None, None]
-        elif len(parts) == 1:
-            return [parts[0], ""]
-        elif len(parts) == 2:
-            return [parts[0], parts[1]]
-        else:
-            # For names with more than two parts, check for common suffixes
-            suffixes = ["Jr.", "Jr", "Sr.", "Sr", "III", "IV", "II"]
-            if parts[-1] in suffixes:
-                # If last part is a suffix, combine the middle parts as last name
-                first_name = parts[0]
-                last_name = ' '.join(parts[1:-1]) + ' ' + parts[-1]
-                return [first_name, last_name]
-            else:
-                # Otherwise, first part is first name, rest is last name
-                first_name = parts[0]
-                last_name = ' '.join(parts[1:])
-                return [first_name, last_name]
-
-
     def getCurrentDateIndex(dates: list) -> int:
         fs = "%A, %B %d, %Y"
         # get the current date in the same format as in MSL
@@ -252,30 +211,11 @@ if tab == "Enter a Mentor Report":
     with st.container():
         st.write("Please select the new referees that were the focus of the mentoring:")
         col1, col2, col3 = st.columns(3)
-        #disabled = False
         with col1:
-            #disabled = True
-            refname = currentMatch['Center']
-            if refname != 'Not Used' and refname != 'None':
-                fname, lname = parseRefName(refname)
-            #    if db.findReferee(lname, fname):
-            #        disabled = False
             centerCB = st.checkbox(f"Center: {currentMatch['Center']}", key='centercb')
         with col2:
-            #disabled = True
-            refname = currentMatch['AR1']
-            if refname != 'Not Used' and refname != 'None':
-                fname, lname = parseRefName(refname)
-            #    if db.findReferee(lname, fname):
-            #        disabled = False
             AR1CB = st.checkbox(f"AR1: {currentMatch['AR1']}", key='ar1cb')
         with col3:
-            #disabled = True
-            refname = currentMatch['AR2']
-            if refname != 'Not Used' and refname != 'None':
-                fname, lname = parseRefName(refname)
-            #    if db.findReferee(lname, fname):
-            #        disabled = False
             AR2CB = st.checkbox(f"AR2: {currentMatch['AR2']}", key='ar2cb')
     #----------------------------------------------------
 
@@ -346,54 +286,38 @@ if tab == "Enter a Mentor Report":
 
     def doSave() -> None:
 
-        global messagebox
-
         # get mentor
         mentor = st.session_state['mentorKey'].lower()
 
         # checkbox states - only report for refs that have been selected
         refs = [centerCB, AR1CB, AR2CB]
         position = ['Center', 'AR1', 'AR2']
+        revisits = [st.session_state.revisitCenter, st.session_state.revisitAR1, st.session_state.revisitAR2]
 
-        # tracks refs and the position they had
+        # tracks refs, the position they had and whether they need a revisit
         refIds = []
 
         for i, ref in enumerate(refs):
             if ref is True:
                 ref = currentMatch[position[i]]
-                refIds.append((ref, position[i]))
-        for id in refIds:
-            # status, message = db.addMentorSession(mentor,
-            #                                       id[0].lower(), # referee
-            #                                       id[1], # position
-            #                                       st.session_state['dateKey'],
-            #                                       st.session_state['comments'])
-
-            revisit = (id[1] == "Center" and st.session_state.revisitCenter is True) or \
-            (id[1] == "AR1" and st.session_state.revisitAR1 is True) or \
-            (id[1] == "AR2" and st.session_state.revisitAR2 is True)
-            status, message = db.addMentorSessionNew(mentor,
-                                                    id[0].lower(), # referee
-                                                    id[1], # position
-                                                    st.session_state['dateKey'],
-                                                    st.session_state['comments'],
-                                                    revisit)
+                refIds.append((ref, position[i], revisits[i] is True))
 
-            if status:
-
-                if len(refIds) == 1:
-                    st.balloons()
+        # one report, saved in one go
+        results = db.addMentorSessions(mentor,
+                                       refIds,
+                                       st.session_state['dateKey'],
+                                       st.session_state['comments'])
 
+        for ref, status, message in results:
+            if status:
                 # announce the good news
-                #box = st.success(message + f": Referee {id[0]}", icon="✅")
-                messagebox = st.success(message + f": Referee {id[0]}", icon="✅")
-
-                # set up the timer for clearing the message
-                time.sleep(5)
-                messagebox.empty()
+                st.success(message + f": Referee {ref}", icon="✅")
             else:
                 st.error(f'There was some kind of error: {message}', icon="🚨")
 
+        if len(results) == 1 and results[0][1]:
+            st.balloons()
+
         # reset the form
         formReset()
     #----------------------------------------------------
@@ -475,13 +399,8 @@ elif tab == 'Generate Reports':
             else:
                 retVal = db.produceMentorReport(st.session_state.reportMentorSelection, reportFormat)
 
-        if reportFormat == 'Text':
-            return retVal
-        else:
-            getExcelFromText(retVal)
-            with open('report.xlsx', 'rb') as fp:
-                retVal = fp.read()
-            return retVal
+        # the text, or for Excel the spreadsheet's bytes
+        return retVal
     #----------------------------------------------------
 
     #----------------------------------------------------
@@ -567,7 +486,8 @@ elif tab == 'See Current Workload':
 
     output = st.empty()
     with stCapture(output.code):
-        run()
+        # the roster and this weekend's assignments the prefetch worker has
+        run(getSnapshot())
 
 elif tab == "Calendar":
 
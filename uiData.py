@@ -1,26 +1,47 @@
-import mechanicalsoup
-from typing import Tuple
+import os
 
-from refWebSites import MySoccerLeague
+from dataStore import DataStore
 
 initialized = False
 allMatchData = None
 
-def getAllData() -> Tuple[list, dict]:
+# 'thread' runs the prefetch worker inside the app, 'process' leaves it to
+# a separate `python prefetch.py`
+prefetchMode = os.environ.get('MSL_PREFETCH', 'thread')
+
+# seconds a page load waits for the worker's first snapshot before it
+# scrapes MSL itself
+snapshotWait = float(os.environ.get('MSL_SNAPSHOT_WAIT', '60'))
+
+store = DataStore()
+
+
+def getSnapshot(workers: int = None) -> dict:
+    """
+    The latest snapshot the prefetch worker published.  Only the very first
+    page load on a new deploy (no snapshot on disk yet) waits for MSL, and
+    only for snapshotWait seconds.  After that (no prefetch.py running, or
+    its scrapes failing) it scrapes and publishes a snapshot itself, any
+    error from that goes back to the caller.
+    """
+    if prefetchMode == 'thread':
+        from prefetch import startPrefetcher
+        startPrefetcher(store, workers=workers)
+    snapshot = store.wait(timeout=snapshotWait)
+    if snapshot is None:
+        from prefetch import prefetchOnce
+        prefetchOnce(store, workers)
+        snapshot = store.load()
+    return snapshot
+
+
+def getAllData(workers: int = None) -> dict:
     global initialized
     global dates
     global allMatchData
 
-    if not initialized:
-        # get all the data we can
-        br = mechanicalsoup.StatefulBrowser(soup_config={ 'features': 'lxml'})
-        br.addheaders = [('User-agent', 'Chrome')]
-        site = MySoccerLeague(br)
-        dates = site.getAllDatesForSeason()
-
-        allMatchData = {}
-        for date in dates:
-            allMatchData[date] = site.getMatches(date)
-
-        initialized = True
+    snapshot = getSnapshot(workers)
+    dates = snapshot['dates']
+    allMatchData = snapshot['matches']
+    initialized = True
     return allMatchData